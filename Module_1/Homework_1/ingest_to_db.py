@@ -1,8 +1,26 @@
+import math
+import time
+from functools import partial
+
 import click
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 from sqlalchemy import create_engine
 from tqdm.auto import tqdm
 
+from metrics import ChunkMetrics, write_stats
+from writers import (
+    WRITERS,
+    build_indexes,
+    create_partitioned_table,
+    create_table,
+    partitioned_chunk,
+    prepare_upsert_table,
+    upsert_chunk,
+)
+
 date_col_trip = [
     "lpep_pickup_datetime",
     "lpep_dropoff_datetime"
@@ -28,6 +46,14 @@ dtype_trip = {'VendorID': 'Int64',
  'congestion_surcharge': 'float64',
  'cbd_congestion_fee': 'float64'}
 
+key_col_trip = [
+    "VendorID",
+    "lpep_pickup_datetime",
+    "lpep_dropoff_datetime",
+    "PULocationID",
+    "DOLocationID"
+]
+
 dtype_lookup = {
     "LocationID" : "Int64",
     "Borough" : "str",
@@ -35,6 +61,38 @@ dtype_lookup = {
     "service_zone" : "str"
 }
 
+arrow_type_trip = {
+    "Int64": pa.int64(),
+    "float64": pa.float64(),
+    "str": pa.string(),
+}
+
+
+def cast_trip_batch(batch: pa.RecordBatch) -> pa.RecordBatch:
+    """Cast a parquet record batch to the trip schema in Arrow."""
+    columns = []
+    for name, column in zip(batch.schema.names, batch.columns):
+        if name in date_col_trip:
+            if pa.types.is_timestamp(column.type):
+                column = column.cast(pa.timestamp('us'), safe=False)
+            else:
+                column = pc.strptime(column.cast(pa.string()), format='%Y-%m-%d %H:%M:%S', unit='us', error_is_null=True)
+        elif name in dtype_trip:
+            column = column.cast(arrow_type_trip[dtype_trip[name]])
+        columns.append(column)
+    return pa.RecordBatch.from_arrays(columns, names=batch.schema.names)
+
+
+def iter_trip_chunks(path: str, chunksize: int):
+    """Stream a trip parquet file batch by batch, casting each batch before converting to pandas."""
+    parquet_file = pq.ParquetFile(path)
+    for batch in parquet_file.iter_batches(batch_size=chunksize):
+        start = time.perf_counter()
+        df = cast_trip_batch(batch).to_pandas(types_mapper={pa.int64(): pd.Int64Dtype()}.get)
+        df.attrs["cast_s"] = time.perf_counter() - start
+        yield df
+
+
 @click.command()
 @click.option('--user', default='root', help='PostgreSQL username')
 @click.option('--password', default='root', help='PostgreSQL password')
@@ -42,35 +100,70 @@ dtype_lookup = {
 @click.option('--port', default='5432', help='PostgreSQL port')
 @click.option('--table', default='yellow_taxi_data', help='Target table name')
 @click.option('--db', default='ny_taxi_db', help='PostgreSQL database name')
+@click.option('--if-exists', default='replace', type=click.Choice(['replace', 'append', 'upsert']),
+              help='What to do with an existing trip table (upsert skips rows already loaded)')
+@click.option('--partition', is_flag=True, help='Range-partition the trip table by pickup month and index it after the load')
 @click.option('--chunksize', default=10000, type=int, help='Chunk size for batch inserts')
-def main(user, password, host, port, table, db, chunksize):
+@click.option('--writer', default='copy-csv', type=click.Choice(list(WRITERS)), help='Writer backend for each chunk')
+@click.option('--trip-file', default='green_tripdata_2025-11.parquet', help='Trip parquet file to load')
+@click.option('--lookup-file', default='taxi_zone_lookup.csv', help='Zone lookup CSV file to load')
+@click.option('--stats-file', default=None, type=click.Path(dir_okay=False), help='Write a JSON run summary with per-stage timings')
+@click.option('--metrics-file', default=None, type=click.Path(dir_okay=False), help='Append one JSON line of rows/bytes/timings per chunk')
+@click.option('--prom-file', default=None, type=click.Path(dir_okay=False), help='Write run totals as a Prometheus textfile (node_exporter)')
+def main(user, password, host, port, table, db, if_exists, partition, chunksize, writer, trip_file, lookup_file, stats_file,
+         metrics_file, prom_file):
     """
     Ingest trip and lookup data into PostgreSQL database.
     """
+    start = time.perf_counter()
+    metrics = ChunkMetrics(metrics_file, labels={"table": table, "writer": writer})
+    timer = metrics.timer
+
     click.echo(f"Connecting to PostgreSQL at {host}:{port}/{db}")
     engine = create_engine(f"postgresql://{user}:{password}@{host}:{port}/{db}")
 
-    lookup = pd.read_csv('taxi_zone_lookup.csv', dtype=dtype_lookup)
-    lookup.to_sql(name='taxi_zone_lookup', con=engine, if_exists='replace', index=False)
+    with timer.time("lookup"):
+        lookup = pd.read_csv(lookup_file, dtype=dtype_lookup)
+        lookup.to_sql(name='taxi_zone_lookup', con=engine, if_exists='replace', index=False)
     click.echo(f"✅ Successfully ingested lookup data into 'taxi_zone_lookup'")
 
-    trip = pd.read_parquet("green_tripdata_2025-11.parquet")
-    for i in date_col_trip:
-        trip[i] = pd.to_datetime(trip[i],errors='coerce')
-    trip = trip.astype(dtype_trip)
+    n_chunks = math.ceil(pq.ParquetFile(trip_file).metadata.num_rows / chunksize)
 
+    partition_column = date_col_trip[0] if partition else None
+    write_chunk = WRITERS[writer]
+    if if_exists == 'upsert':
+        write_chunk = partial(upsert_chunk, write_chunk=write_chunk, key_columns=key_col_trip,
+                              partition_column=partition_column)
+    create = create_table
+    if partition:
+        write_chunk = partial(partitioned_chunk, write_chunk=write_chunk, partition_column=partition_column)
+        create = partial(create_partitioned_table, partition_column=partition_column)
     first = True
     total_rows = 0
-    click.echo(f"Ingesting trip data into table '{table}'...")
-    for start in tqdm(range(0, len(trip), chunksize), desc="Processing chunks"):
-        df_chunk = trip.iloc[start:start + chunksize]
+    click.echo(f"Ingesting trip data into table '{table}' using '{writer}' writer...")
+    write_chunk = metrics.instrument_writer(write_chunk)
+    trip_chunks = metrics.instrument_chunks(iter_trip_chunks(trip_file, chunksize))
+    for df_chunk in tqdm(trip_chunks, total=n_chunks, desc="Processing chunks"):
         if first:
-            df_chunk.to_sql(name=table, con=engine, if_exists='replace', index=False)
+            create(df_chunk, table, engine, if_exists='replace' if if_exists == 'replace' else 'append')
+            if if_exists == 'upsert':
+                prepare_upsert_table(engine, table, key_col_trip, partition_column=partition_column)
             first = False
-        else:
-            df_chunk.to_sql(name=table, con=engine, if_exists='append', index=False)
+        with engine.begin() as conn:
+            write_chunk(df_chunk, table, conn)
         total_rows += len(df_chunk)
 
+    if partition:
+        click.echo(f"Building indexes on '{table}'...")
+        with timer.time("index"):
+            build_indexes(engine, table, partition_column)
+
+    metrics.close()
+
+    if stats_file:
+        write_stats(stats_file, total_rows, time.perf_counter() - start, timer)
+    if prom_file:
+        metrics.write_prometheus(prom_file, time.perf_counter() - start)
     click.echo(f"✅ Successfully ingested trip data {total_rows:,} rows into '{table}'")
 
 if __name__ == '__main__':
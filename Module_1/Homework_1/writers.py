@@ -0,0 +1,260 @@
+# Homework_1 is its own Docker build context, so it keeps a byte-for-byte copy of this
+# module from practice/pipeline. Change both copies together; practice/pipeline/tests
+# checks that they match.
+import io
+import struct
+import threading
+
+import pandas as pd
+from sqlalchemy import inspect
+
+
+# PostgreSQL binary COPY framing
+PGCOPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack("!ii", 0, 0)
+PGCOPY_TRAILER = struct.pack("!h", -1)
+PG_NULL = struct.pack("!i", -1)
+PG_EPOCH = pd.Timestamp("2000-01-01")
+
+# Row key column used by upsert loads
+ROW_KEY = "unique_row_id"
+
+# Columns that get a btree index after a partitioned load
+LOCATION_COLUMNS = ["PULocationID", "DOLocationID"]
+
+# Monthly partitions already created by this process, per table
+_partitions = {}
+_partitions_lock = threading.Lock()
+
+
+def quote_ident(name: str) -> str:
+    """Quote a PostgreSQL identifier (table or column name)."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def create_table(df: pd.DataFrame, table: str, engine, if_exists: str = "replace") -> None:
+    """Create the target table from the DataFrame schema without inserting rows."""
+    df.head(0).to_sql(name=table, con=engine, if_exists=if_exists, index=False)
+
+
+def create_partitioned_table(df: pd.DataFrame, table: str, engine, if_exists: str = "replace", *,
+                             partition_column: str) -> None:
+    """Create the target table range-partitioned on partition_column, with a DEFAULT partition for NULLs."""
+    with engine.begin() as conn:
+        if if_exists == "replace":
+            conn.exec_driver_sql(f"DROP TABLE IF EXISTS {quote_ident(table)} CASCADE")
+        if not inspect(conn).has_table(table):
+            ddl = pd.io.sql.get_schema(df.head(0), table, con=conn).strip()
+            conn.exec_driver_sql(f"{ddl} PARTITION BY RANGE ({quote_ident(partition_column)})")
+            conn.exec_driver_sql(
+                f"CREATE TABLE IF NOT EXISTS {quote_ident(table + '_default')} "
+                f"PARTITION OF {quote_ident(table)} DEFAULT"
+            )
+    with _partitions_lock:
+        _partitions.pop(table, None)
+
+
+def ensure_partitions(df: pd.DataFrame, table: str, engine, partition_column: str) -> None:
+    """Attach one partition per calendar month present in the chunk, if not already there."""
+    months = df[partition_column].dropna().dt.to_period("M").unique()
+    with _partitions_lock:
+        missing = [m for m in months if m not in _partitions.setdefault(table, set())]
+    if not missing:
+        return
+
+    with engine.begin() as conn:
+        # Serialise partition DDL across writer threads and processes
+        conn.exec_driver_sql("SELECT pg_advisory_xact_lock(hashtext(%(table)s))", {"table": table})
+        for month in missing:
+            start, end = month.start_time.date(), (month + 1).start_time.date()
+            conn.exec_driver_sql(
+                f"CREATE TABLE IF NOT EXISTS {quote_ident(f'{table}_{month.year}_{month.month:02d}')} "
+                f"PARTITION OF {quote_ident(table)} FOR VALUES FROM ('{start}') TO ('{end}')"
+            )
+    with _partitions_lock:
+        _partitions[table].update(missing)
+
+
+def partitioned_chunk(df: pd.DataFrame, table: str, conn, write_chunk, partition_column: str) -> None:
+    """Make sure the chunk's monthly partitions exist, then write it with the given writer."""
+    ensure_partitions(df, table, conn.engine, partition_column)
+    write_chunk(df, table, conn)
+
+
+def build_indexes(engine, table: str, partition_column: str) -> None:
+    """Build indexes after the load: BRIN on pickup time, btree on location IDs."""
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            f"CREATE INDEX IF NOT EXISTS {quote_ident(f'{table}_{partition_column}_brin')} "
+            f"ON {quote_ident(table)} USING brin ({quote_ident(partition_column)})"
+        )
+        for column in LOCATION_COLUMNS:
+            conn.exec_driver_sql(
+                f"CREATE INDEX IF NOT EXISTS {quote_ident(f'{table}_{column}_idx')} "
+                f"ON {quote_ident(table)} ({quote_ident(column)})"
+            )
+
+
+def copy_sql(df: pd.DataFrame, table: str, fmt: str) -> str:
+    """Build the COPY ... FROM STDIN statement for the DataFrame columns."""
+    columns = ", ".join(quote_ident(str(c)) for c in df.columns)
+    return f"COPY {quote_ident(table)} ({columns}) FROM STDIN WITH (FORMAT {fmt})"
+
+
+def write_to_sql(df: pd.DataFrame, table: str, conn) -> None:
+    """Append a chunk with pandas INSERT statements (fallback writer)."""
+    df.to_sql(name=table, con=conn, if_exists="append", index=False)
+
+
+def write_copy_csv(df: pd.DataFrame, table: str, conn) -> None:
+    """Append a chunk by streaming it as CSV through COPY ... FROM STDIN."""
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+
+    cursor = conn.connection.cursor()
+    try:
+        cursor.copy_expert(copy_sql(df, table, "csv"), buffer)
+    finally:
+        cursor.close()
+
+
+def _pack_text(value) -> bytes:
+    """Encode a text field as length-prefixed UTF-8."""
+    data = str(value).encode("utf-8")
+    return struct.pack("!i", len(data)) + data
+
+
+def _encode_column(series: pd.Series) -> list[bytes]:
+    """Encode one column into PostgreSQL binary COPY fields (length + payload)."""
+    mask = series.isna().to_numpy()
+
+    if pd.api.types.is_datetime64_any_dtype(series):
+        if series.dt.tz is not None:
+            series = series.dt.tz_convert("UTC").dt.tz_localize(None)
+        micros = (series - PG_EPOCH) // pd.Timedelta(microseconds=1)
+        values = micros.to_numpy(dtype="int64", na_value=0)
+        fmt = "!iq"
+    elif pd.api.types.is_bool_dtype(series):
+        values = series.to_numpy(dtype="bool", na_value=False)
+        fmt = "!i?"
+    elif pd.api.types.is_integer_dtype(series):
+        # Mirror the column types pandas.to_sql creates for each integer width
+        name = series.dtype.name.lower()
+        if name in ("int8", "uint8", "int16"):
+            fmt = "!ih"
+        elif name in ("uint16", "int32"):
+            fmt = "!ii"
+        else:
+            fmt = "!iq"
+        values = series.to_numpy(dtype="int64", na_value=0)
+    elif pd.api.types.is_float_dtype(series):
+        fmt = "!if" if series.dtype.name.lower() == "float32" else "!id"
+        values = series.to_numpy(dtype="float64", na_value=0.0)
+    elif pd.api.types.is_string_dtype(series) or series.dtype == object:
+        return [PG_NULL if is_null else _pack_text(v) for is_null, v in zip(mask, series.tolist())]
+    else:
+        raise ValueError(
+            f"Column '{series.name}' has dtype {series.dtype} which the binary COPY writer "
+            f"does not support. Use --writer copy-csv instead."
+        )
+
+    size = struct.calcsize(fmt) - 4
+    packer = struct.Struct(fmt)
+    return [PG_NULL if is_null else packer.pack(size, v) for is_null, v in zip(mask, values.tolist())]
+
+
+def write_copy_binary(df: pd.DataFrame, table: str, conn) -> None:
+    """Append a chunk by streaming PostgreSQL binary COPY format."""
+    columns = [_encode_column(df[c]) for c in df.columns]
+    field_count = struct.pack("!h", len(df.columns))
+
+    buffer = io.BytesIO()
+    buffer.write(PGCOPY_HEADER)
+    for row in zip(*columns):
+        buffer.write(field_count)
+        buffer.write(b"".join(row))
+    buffer.write(PGCOPY_TRAILER)
+    buffer.seek(0)
+
+    cursor = conn.connection.cursor()
+    try:
+        cursor.copy_expert(copy_sql(df, table, "binary"), buffer)
+    finally:
+        cursor.close()
+
+
+def row_key_sql(key_columns: list[str]) -> str:
+    """
+    SQL expression hashing the trip identity columns, like unique_row_id in taxi_helpers.
+
+    The columns are hashed as one row literal: values containing the separator
+    are quoted and NULL is written differently from an empty string, so two
+    different trips cannot produce the same text.
+    """
+    columns = ", ".join(quote_ident(c) for c in key_columns)
+    return f"MD5(ROW({columns})::text)"
+
+
+def _conflict_columns(partition_column: str | None) -> str:
+    # Unique indexes on a partitioned table must include the partition key
+    columns = [ROW_KEY] if partition_column is None else [ROW_KEY, partition_column]
+    return ", ".join(quote_ident(c) for c in columns)
+
+
+def prepare_upsert_table(engine, table: str, key_columns: list[str], partition_column: str | None = None) -> None:
+    """
+    Add the row key column and its unique index to the target table if missing.
+
+    Rows written without a key (by a replace or append load that was cut
+    short) get theirs filled in first, so an upsert rerun skips them instead
+    of inserting them again. Duplicates among those rows keep one copy.
+    """
+    index = f"{table}_{ROW_KEY}_key"
+    key = quote_ident(ROW_KEY)
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f"ALTER TABLE {quote_ident(table)} ADD COLUMN IF NOT EXISTS {key} TEXT")
+        missing = conn.exec_driver_sql(
+            f"SELECT EXISTS (SELECT 1 FROM {quote_ident(table)} WHERE {key} IS NULL)"
+        ).scalar()
+        if missing:
+            # Filled-in keys may repeat existing ones, so the index is rebuilt after de-duplicating
+            conn.exec_driver_sql(f"DROP INDEX IF EXISTS {quote_ident(index)}")
+            filled = conn.exec_driver_sql(
+                f"UPDATE {quote_ident(table)} SET {key} = {row_key_sql(key_columns)} WHERE {key} IS NULL"
+            ).rowcount
+            removed = conn.exec_driver_sql(
+                f"DELETE FROM {quote_ident(table)} a USING {quote_ident(table)} b "
+                f"WHERE a.{key} = b.{key} AND (a.tableoid, a.ctid) > (b.tableoid, b.ctid)"
+            ).rowcount
+            print(f"Filled in {ROW_KEY} for {filled:,} existing row(s) of '{table}', removed {removed:,} duplicate(s)")
+        conn.exec_driver_sql(
+            f"CREATE UNIQUE INDEX IF NOT EXISTS {quote_ident(index)} ON {quote_ident(table)} "
+            f"({_conflict_columns(partition_column)})"
+        )
+
+
+def upsert_chunk(df: pd.DataFrame, table: str, conn, write_chunk, key_columns: list[str],
+                 partition_column: str | None = None) -> None:
+    """
+    Load a chunk into a session-local staging table with the given writer, then
+    insert only rows whose key is not already in the target.
+    """
+    staging = f"{table}_staging"
+    conn.exec_driver_sql(
+        f"CREATE TEMP TABLE {quote_ident(staging)} (LIKE {quote_ident(table)} INCLUDING DEFAULTS) ON COMMIT DROP"
+    )
+    write_chunk(df, staging, conn)
+
+    columns = ", ".join(quote_ident(str(c)) for c in df.columns)
+    conn.exec_driver_sql(
+        f"INSERT INTO {quote_ident(table)} ({columns}, {quote_ident(ROW_KEY)}) "
+        f"SELECT {columns}, {row_key_sql(key_columns)} FROM {quote_ident(staging)} "
+        f"ON CONFLICT ({_conflict_columns(partition_column)}) DO NOTHING"
+    )
+
+
+WRITERS = {
+    "copy-csv": write_copy_csv,
+    "copy-binary": write_copy_binary,
+    "to_sql": write_to_sql,
+}
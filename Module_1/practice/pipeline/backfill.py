@@ -0,0 +1,173 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import click
+from sqlalchemy import create_engine
+
+from cache import DEFAULT_CACHE_DIR, fetch
+from ingest_data import TAXI_SCHEMAS, database_url, ingest, key_columns, source_url
+from metrics import ChunkMetrics
+from readers import READERS
+from writers import (
+    WRITERS,
+    build_indexes,
+    create_partitioned_table,
+    create_table,
+    prepare_upsert_table,
+)
+
+
+def month_range(start: str, end: str) -> list[tuple[int, int]]:
+    """Expand an inclusive YYYY-MM range into (year, month) pairs."""
+    start_year, start_month = (int(p) for p in start.split('-'))
+    end_year, end_month = (int(p) for p in end.split('-'))
+    months = []
+    year, month = start_year, start_month
+    while (year, month) <= (end_year, end_month):
+        months.append((year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def resolve_source(url: str, cache_dir: str | None, max_bytes: int) -> str:
+    """Return a cached local path for the URL, or the URL itself when caching is off."""
+    return fetch(url, cache_dir=cache_dir, max_bytes=max_bytes) if cache_dir else url
+
+
+def prepare_table(engine, taxi: str, year: int, month: int, table: str, reader: str,
+                  replace: bool, upsert: bool, partition: bool, cache_dir: str | None, max_bytes: int) -> None:
+    """Create the target table once, from a sample of the first month, before workers append."""
+    dtype, parse_dates = TAXI_SCHEMAS[taxi]
+    partition_column = parse_dates[0] if partition else None
+    source = resolve_source(source_url(taxi, year, month), cache_dir, max_bytes)
+    sample = next(iter(READERS[reader](source, 1000, dtype, parse_dates)))
+    if_exists = 'replace' if replace else 'append'
+    if partition:
+        create_partitioned_table(sample, table, engine, if_exists, partition_column=partition_column)
+    else:
+        create_table(sample, table, engine, if_exists=if_exists)
+    if upsert:
+        prepare_upsert_table(engine, table, key_columns(taxi), partition_column=partition_column)
+
+
+def ingest_month(db_url: str, taxi: str, year: int, month: int, table: str, chunksize: int,
+                 reader: str, writer: str, upsert: bool, partition: bool, cache_dir: str | None,
+                 max_bytes: int, metrics_file: str | None = None) -> dict:
+    """Load one month in a worker process and report its row count and timing."""
+    start = time.perf_counter()
+    engine = create_engine(db_url, pool_size=1)
+    metrics = ChunkMetrics(metrics_file, labels={"table": table, "month": f"{year}-{month:02d}", "writer": writer})
+    try:
+        source = resolve_source(source_url(taxi, year, month), cache_dir, max_bytes)
+        rows = ingest(
+            engine,
+            source,
+            table,
+            taxi=taxi,
+            chunksize=chunksize,
+            reader=reader,
+            writer=writer,
+            if_exists='upsert' if upsert else 'append',
+            partition=partition,
+            build_index=False,
+            progress=False,
+            metrics=metrics,
+        )
+    finally:
+        metrics.close()
+        engine.dispose()
+    return {"rows": rows, "seconds": time.perf_counter() - start}
+
+
+@click.command()
+@click.option('--user', default='root', help='PostgreSQL username')
+@click.option('--password', default='root', help='PostgreSQL password')
+@click.option('--host', default='localhost', help='PostgreSQL host')
+@click.option('--port', default='5432', help='PostgreSQL port')
+@click.option('--db', default='ny_taxi', help='PostgreSQL database name')
+@click.option('--start', 'start_month', required=True, help='First month to load (YYYY-MM)')
+@click.option('--end', 'end_month', required=True, help='Last month to load, inclusive (YYYY-MM)')
+@click.option('--taxi', 'taxis', multiple=True, default=['yellow'], type=click.Choice(list(TAXI_SCHEMAS)), help='Taxi type (repeatable)')
+@click.option('--table', default='{taxi}_taxi_data', help='Target table name template')
+@click.option('--replace', is_flag=True, help='Drop and recreate the target tables before loading')
+@click.option('--upsert', is_flag=True, help='Skip rows already in the table so failed backfills can be rerun')
+@click.option('--partition', is_flag=True, help='Range-partition the tables by pickup month and index them after the load')
+@click.option('--processes', default=4, type=click.IntRange(min=1), help='Months loaded in parallel')
+@click.option('--chunksize', default=100000, type=int, help='Chunk size for batch inserts')
+@click.option('--reader', default='pandas', type=click.Choice(list(READERS)), help='CSV reader engine')
+@click.option('--writer', default='copy-csv', type=click.Choice(list(WRITERS)), help='Writer backend for each chunk')
+@click.option('--cache-dir', default=DEFAULT_CACHE_DIR, show_default=True, help='Download cache directory')
+@click.option('--cache-max-gb', default=20.0, type=float, help='Download cache size cap in GB (LRU eviction)')
+@click.option('--no-cache', is_flag=True, help='Stream straight from the URL without caching')
+@click.option('--metrics-file', default=None, type=click.Path(dir_okay=False), help='Append one JSON line of rows/bytes/timings per chunk, for every month')
+def main(user, password, host, port, db, start_month, end_month, taxis, table, replace, upsert, partition,
+         processes, chunksize, reader, writer, cache_dir, cache_max_gb, no_cache, metrics_file):
+    """Backfill a range of months for one or more taxi types in parallel."""
+    months = month_range(start_month, end_month)
+    if not months:
+        raise click.BadParameter(f"--end {end_month} is before --start {start_month}")
+
+    db_url = database_url(user, password, host, port, db)
+    cache_dir = None if no_cache else cache_dir
+    max_bytes = int(cache_max_gb * 1024 ** 3)
+
+    click.echo(f"Connecting to PostgreSQL at {host}:{port}/{db}")
+    engine = create_engine(db_url)
+    for taxi in taxis:
+        year, month = months[0]
+        click.echo(f"Preparing table '{table.format(taxi=taxi)}'...")
+        prepare_table(engine, taxi, year, month, table.format(taxi=taxi), reader, replace, upsert,
+                      partition, cache_dir, max_bytes)
+    engine.dispose()
+
+    jobs = [(taxi, year, month) for taxi in taxis for year, month in months]
+    click.echo(f"Loading {len(jobs)} month(s) with {processes} process(es)...")
+
+    start = time.perf_counter()
+    results = {}
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        futures = {
+            pool.submit(ingest_month, db_url, taxi, year, month, table.format(taxi=taxi),
+                        chunksize, reader, writer, upsert, partition, cache_dir, max_bytes,
+                        metrics_file): (taxi, year, month)
+            for taxi, year, month in jobs
+        }
+        for future in as_completed(futures):
+            job = futures[future]
+            taxi, year, month = job
+            try:
+                results[job] = future.result()
+                click.echo(f"✓ {taxi} {year}-{month:02d}: {results[job]['rows']:,} rows")
+            except Exception as e:
+                results[job] = {"error": str(e)}
+                click.echo(f"✗ {taxi} {year}-{month:02d}: {e}")
+    elapsed = time.perf_counter() - start
+
+    click.echo("")
+    click.echo(f"{'taxi':<8} {'month':<8} {'rows':>12} {'seconds':>9} {'rows/sec':>10}")
+    for taxi, year, month in jobs:
+        result = results[(taxi, year, month)]
+        if "error" in result:
+            click.echo(f"{taxi:<8} {year}-{month:02d}  {'FAILED':>12}")
+            continue
+        rate = result['rows'] / result['seconds'] if result['seconds'] else 0
+        click.echo(f"{taxi:<8} {year}-{month:02d}  {result['rows']:>12,} {result['seconds']:>9.1f} {rate:>10,.0f}")
+
+    total_rows = sum(r.get('rows', 0) for r in results.values())
+    failed = [job for job, r in results.items() if "error" in r]
+    click.echo(f"Total: {total_rows:,} rows in {elapsed:.1f}s ({total_rows / elapsed:,.0f} rows/sec)")
+
+    if partition:
+        engine = create_engine(db_url)
+        for taxi in taxis:
+            click.echo(f"Building indexes on '{table.format(taxi=taxi)}'...")
+            build_indexes(engine, table.format(taxi=taxi), TAXI_SCHEMAS[taxi][1][0])
+        engine.dispose()
+
+    if failed:
+        raise click.ClickException(f"{len(failed)} month(s) failed to load")
+    click.echo(f"✅ Backfill of {len(jobs)} month(s) complete")
+
+
+if __name__ == '__main__':
+    main()
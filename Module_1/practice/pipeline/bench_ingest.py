@@ -0,0 +1,187 @@
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import click
+import numpy as np
+import pandas as pd
+
+from readers import READERS
+from writers import WRITERS
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS = {
+    "ingest_data": os.path.join(HERE, "ingest_data.py"),
+    "ingest_to_db": os.path.join(HERE, "..", "..", "Homework_1", "ingest_to_db.py"),
+}
+SEED = 42
+
+
+def synthetic_trips(rows: int, pickup_col: str, dropoff_col: str, start: str) -> pd.DataFrame:
+    """Generate a reproducible month of taxi trips with the TLC column layout."""
+    rng = np.random.default_rng(SEED)
+    pickup = pd.Timestamp(start) + pd.to_timedelta(rng.integers(0, 28 * 86400, rows), unit="s")
+    return pd.DataFrame({
+        "VendorID": rng.integers(1, 3, rows),
+        pickup_col: pickup,
+        dropoff_col: pickup + pd.to_timedelta(rng.integers(60, 3600, rows), unit="s"),
+        "passenger_count": rng.integers(1, 6, rows),
+        "trip_distance": rng.gamma(2.0, 1.5, rows).round(2),
+        "RatecodeID": rng.choice([1, 2, 5], rows, p=[0.95, 0.03, 0.02]),
+        "store_and_fwd_flag": rng.choice(["N", "Y"], rows, p=[0.99, 0.01]),
+        "PULocationID": rng.integers(1, 266, rows),
+        "DOLocationID": rng.integers(1, 266, rows),
+        "payment_type": rng.integers(1, 5, rows),
+        "fare_amount": rng.gamma(2.0, 6.0, rows).round(2),
+        "extra": rng.choice([0.0, 0.5, 1.0], rows),
+        "mta_tax": 0.5,
+        "tip_amount": rng.gamma(1.0, 2.0, rows).round(2),
+        "tolls_amount": 0.0,
+        "improvement_surcharge": 0.3,
+        "total_amount": rng.gamma(2.0, 9.0, rows).round(2),
+        "congestion_surcharge": rng.choice([0.0, 2.5], rows),
+    })
+
+
+def prepare_inputs(data_dir: str, rows: int) -> dict:
+    """Write the synthetic input files once per data directory and return their paths."""
+    os.makedirs(data_dir, exist_ok=True)
+    paths = {
+        "yellow": os.path.join(data_dir, f"yellow_synthetic_{rows}.csv.gz"),
+        "green": os.path.join(data_dir, f"green_synthetic_{rows}.parquet"),
+        "lookup": os.path.join(data_dir, "taxi_zone_lookup_synthetic.csv"),
+    }
+    if not os.path.exists(paths["yellow"]):
+        click.echo(f"Generating {paths['yellow']}...")
+        synthetic_trips(rows, "tpep_pickup_datetime", "tpep_dropoff_datetime", "2021-01-01").to_csv(
+            paths["yellow"], index=False
+        )
+    if not os.path.exists(paths["green"]):
+        click.echo(f"Generating {paths['green']}...")
+        green = synthetic_trips(rows, "lpep_pickup_datetime", "lpep_dropoff_datetime", "2025-11-01")
+        green["ehail_fee"] = np.nan
+        green["trip_type"] = 1.0
+        green["cbd_congestion_fee"] = 0.0
+        green.to_parquet(paths["green"], index=False)
+    if not os.path.exists(paths["lookup"]):
+        pd.DataFrame({
+            "LocationID": range(1, 266),
+            "Borough": "Manhattan",
+            "Zone": [f"Zone {i}" for i in range(1, 266)],
+            "service_zone": "Yellow Zone",
+        }).to_csv(paths["lookup"], index=False)
+    return paths
+
+
+def run_config(script: str, args: list[str], log_path: str) -> dict:
+    """Run one ingest CLI in a child process; return wall time, peak RSS and its stats file."""
+    stats_path = f"{log_path}.stats.json"
+    with open(log_path, "w") as log:
+        start = time.perf_counter()
+        proc = subprocess.Popen(
+            [sys.executable, SCRIPTS[script], *args, "--stats-file", stats_path],
+            stdout=log,
+            stderr=subprocess.STDOUT,
+        )
+        _, status, usage = os.wait4(proc.pid, 0)
+        wall = time.perf_counter() - start
+    # Reaped by wait4 above, so record the exit code on the Popen object ourselves
+    proc.returncode = os.waitstatus_to_exitcode(status)
+
+    if proc.returncode != 0:
+        with open(log_path) as f:
+            tail = f.read()[-2000:]
+        return {"error": f"exit code {proc.returncode}", "log_tail": tail}
+
+    with open(stats_path) as f:
+        stats = json.load(f)
+    return {
+        "rows": stats["rows"],
+        "seconds": round(wall, 3),
+        "rows_per_sec": round(stats["rows"] / wall),
+        # ru_maxrss is reported in kilobytes on Linux
+        "peak_rss_mb": round(usage.ru_maxrss / 1024, 1),
+        "stages": stats["stages"],
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+@click.command()
+@click.option('--user', default='root', help='PostgreSQL username')
+@click.option('--password', default='root', help='PostgreSQL password')
+@click.option('--host', default='localhost', help='PostgreSQL host')
+@click.option('--port', default='5432', help='PostgreSQL port')
+@click.option('--db', default='ny_taxi', help='PostgreSQL database name')
+@click.option('--script', 'scripts', multiple=True, default=list(SCRIPTS), type=click.Choice(list(SCRIPTS)), help='Ingest entry point to benchmark (repeatable)')
+@click.option('--rows', default=500000, type=int, help='Rows in each synthetic input file')
+@click.option('--source', default=None, type=click.Path(exists=True, dir_okay=False), help='Use this yellow CSV(.gz) instead of synthetic data for ingest_data')
+@click.option('--chunksize', 'chunksizes', multiple=True, default=[10000, 50000, 100000], type=int, help='Chunk size to sweep (repeatable)')
+@click.option('--writer', 'writers', multiple=True, default=list(WRITERS), type=click.Choice(list(WRITERS)), help='Writer backend to sweep (repeatable)')
+@click.option('--reader', 'readers', multiple=True, default=['pandas'], type=click.Choice(list(READERS)), help='Reader engine to sweep for ingest_data (repeatable)')
+@click.option('--workers', 'worker_counts', multiple=True, default=[1, 4], type=click.IntRange(min=1), help='Writer worker count to sweep for ingest_data (repeatable)')
+@click.option('--data-dir', default=os.path.join(tempfile.gettempdir(), 'ny_taxi_bench'), show_default=True, help='Where synthetic inputs and run logs are kept')
+@click.option('--output', default='bench_results.json', type=click.Path(dir_okay=False), help='JSON results file')
+def main(user, password, host, port, db, scripts, rows, source, chunksizes, writers, readers, worker_counts, data_dir, output):
+    """Sweep chunk size, writer backend and worker count over the ingest CLIs against a local Postgres."""
+    inputs = prepare_inputs(data_dir, rows)
+    db_args = ['--user', user, '--password', password, '--host', host, '--port', port, '--db', db]
+
+    configs = []
+    if "ingest_data" in scripts:
+        for chunksize, writer, reader, workers in itertools.product(chunksizes, writers, readers, worker_counts):
+            configs.append(("ingest_data", {"chunksize": chunksize, "writer": writer, "reader": reader, "workers": workers}, [
+                '--table', 'bench_yellow', '--source', source or inputs["yellow"],
+                '--chunksize', str(chunksize), '--writer', writer, '--reader', reader, '--workers', str(workers),
+            ]))
+    if "ingest_to_db" in scripts:
+        for chunksize, writer in itertools.product(chunksizes, writers):
+            configs.append(("ingest_to_db", {"chunksize": chunksize, "writer": writer}, [
+                '--table', 'bench_green', '--trip-file', inputs["green"], '--lookup-file', inputs["lookup"],
+                '--chunksize', str(chunksize), '--writer', writer,
+            ]))
+
+    runs = []
+    for i, (script, params, args) in enumerate(configs, start=1):
+        label = " ".join(f"{k}={v}" for k, v in params.items())
+        click.echo(f"[{i}/{len(configs)}] {script} {label}")
+        result = run_config(script, db_args + args, os.path.join(data_dir, f"run_{i}.log"))
+        runs.append({"script": script, **params, **result})
+        if "error" in result:
+            click.echo(f"    ✗ {result['error']}")
+        else:
+            click.echo(f"    {result['rows_per_sec']:,} rows/sec, peak RSS {result['peak_rss_mb']} MB, stages {result['stages']}")
+
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "rows": rows,
+            "source": source or "synthetic",
+        },
+        "runs": runs,
+    }
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write("\n")
+    click.echo(f"✅ Wrote {len(runs)} run(s) to {output}")
+
+
+if __name__ == '__main__':
+    main()
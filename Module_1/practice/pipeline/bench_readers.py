@@ -0,0 +1,29 @@
+import time
+
+import click
+
+from ingest_data import DTYPE, PARSE_DATES
+from readers import READERS
+
+
+@click.command()
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--chunksize', default=100000, type=int, help='Rows per chunk')
+@click.option('--repeat', default=3, type=int, help='Runs per reader engine (best time is reported)')
+def main(path, chunksize, repeat):
+    """Compare the pandas and Arrow CSV reader engines on a local taxi CSV(.gz) file."""
+    click.echo(f"Benchmarking readers on {path} (chunksize={chunksize:,}, repeat={repeat})")
+    click.echo(f"{'reader':<8} {'rows':>12} {'best (s)':>10} {'rows/sec':>12}")
+
+    for name, read_chunks in READERS.items():
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            rows = sum(len(chunk) for chunk in read_chunks(path, chunksize, DTYPE, PARSE_DATES))
+            timings.append(time.perf_counter() - start)
+        best = min(timings)
+        click.echo(f"{name:<8} {rows:>12,} {best:>10.2f} {rows / best:>12,.0f}")
+
+
+if __name__ == '__main__':
+    main()
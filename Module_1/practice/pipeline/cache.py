@@ -0,0 +1,178 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from pathlib import PurePosixPath
+from urllib.parse import urlparse
+
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "TAXI_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "ny_taxi"),
+)
+DEFAULT_MAX_BYTES = 20 * 1024 ** 3
+READ_SIZE = 1024 * 1024
+TIMEOUT = 60
+
+
+def _url_key(url: str) -> str:
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    """Write a file via a temp file + rename so readers never see a partial file."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _index_path(cache_dir: str, url: str) -> str:
+    return os.path.join(cache_dir, "index", f"{_url_key(url)}.json")
+
+
+def _blob_path(cache_dir: str, entry: dict) -> str:
+    return os.path.join(cache_dir, "blobs", entry["blob"])
+
+
+def _load_entries(cache_dir: str) -> list[dict]:
+    """Read every index entry, skipping any that are unreadable."""
+    index_dir = os.path.join(cache_dir, "index")
+    entries = []
+    for name in os.listdir(index_dir):
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(index_dir, name)) as f:
+                entries.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return entries
+
+
+def _read_entry(cache_dir: str, url: str) -> dict | None:
+    """Return the index entry for a URL if its blob is still on disk."""
+    try:
+        with open(_index_path(cache_dir, url)) as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return entry if os.path.exists(_blob_path(cache_dir, entry)) else None
+
+
+def _write_entry(cache_dir: str, entry: dict) -> None:
+    _write_atomic(_index_path(cache_dir, entry["url"]), json.dumps(entry).encode("utf-8"))
+
+
+def _remove_blob_if_unreferenced(cache_dir: str, blob: str) -> bool:
+    """Delete a blob once no index entry points at it. Returns True if it was deleted."""
+    if any(e["blob"] == blob for e in _load_entries(cache_dir)):
+        return False
+    try:
+        os.remove(os.path.join(cache_dir, "blobs", blob))
+    except FileNotFoundError:
+        # Already removed, e.g. by another process sharing the cache
+        return False
+    return True
+
+
+def _download(cache_dir: str, url: str, response) -> dict:
+    """Stream a response body into a content-addressed blob and return its index entry."""
+    suffix = "".join(PurePosixPath(urlparse(url).path).suffixes)
+    blobs_dir = os.path.join(cache_dir, "blobs")
+    digest = hashlib.sha256()
+    size = 0
+
+    fd, tmp_path = tempfile.mkstemp(dir=blobs_dir, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            while block := response.read(READ_SIZE):
+                digest.update(block)
+                f.write(block)
+                size += len(block)
+        blob = f"{digest.hexdigest()}{suffix}"
+        os.replace(tmp_path, os.path.join(blobs_dir, blob))
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return {
+        "url": url,
+        "blob": blob,
+        "size": size,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+    }
+
+
+def evict(cache_dir: str, max_bytes: int, keep: str | None = None) -> None:
+    """Drop least-recently-used entries until the blobs fit within max_bytes."""
+    entries = sorted(_load_entries(cache_dir), key=lambda e: e.get("last_used", 0))
+    total = sum({e["blob"]: e["size"] for e in entries}.values())
+
+    for entry in entries:
+        if total <= max_bytes:
+            break
+        if entry["url"] == keep:
+            continue
+        try:
+            os.remove(_index_path(cache_dir, entry["url"]))
+        except FileNotFoundError:
+            # Another process sharing the cache evicted it first
+            if not os.path.exists(_blob_path(cache_dir, entry)):
+                total -= entry["size"]
+            continue
+        if _remove_blob_if_unreferenced(cache_dir, entry["blob"]):
+            total -= entry["size"]
+        print(f"Evicted {entry['url']} from download cache")
+
+
+def fetch(url: str, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES) -> str:
+    """
+    Return a local path for the URL, downloading it only if the cache is stale.
+
+    Entries are keyed by URL and revalidated with ETag/Last-Modified
+    conditional requests. If the server cannot be reached a cached copy
+    is used as-is.
+    """
+    os.makedirs(os.path.join(cache_dir, "index"), exist_ok=True)
+    os.makedirs(os.path.join(cache_dir, "blobs"), exist_ok=True)
+
+    entry = _read_entry(cache_dir, url)
+    request = urllib.request.Request(url)
+    if entry and entry.get("etag"):
+        request.add_header("If-None-Match", entry["etag"])
+    if entry and entry.get("last_modified"):
+        request.add_header("If-Modified-Since", entry["last_modified"])
+
+    stale_blob = None
+    try:
+        with urllib.request.urlopen(request, timeout=TIMEOUT) as response:
+            new_entry = _download(cache_dir, url, response)
+        if entry and entry["blob"] != new_entry["blob"]:
+            stale_blob = entry["blob"]
+        entry = new_entry
+        print(f"Downloaded {url} into cache ({entry['size']:,} bytes)")
+    except (urllib.error.URLError, OSError) as e:
+        if entry is None:
+            raise
+        if getattr(e, "code", None) == 304:
+            print(f"Cache hit for {url} (not modified)")
+        else:
+            print(f"Could not revalidate {url} ({e}); using cached copy")
+
+    entry["last_used"] = time.time()
+    _write_entry(cache_dir, entry)
+    if stale_blob:
+        _remove_blob_if_unreferenced(cache_dir, stale_blob)
+    evict(cache_dir, max_bytes, keep=url)
+    return _blob_path(cache_dir, entry)
@@ -1,8 +1,25 @@
+import os
+import time
+from functools import partial
+
 import click
-import pandas as pd
 from sqlalchemy import create_engine
 from tqdm.auto import tqdm
 
+from cache import DEFAULT_CACHE_DIR, fetch
+from loader import load_chunks
+from metrics import ChunkMetrics, write_stats
+from readers import READERS
+from writers import (
+    WRITERS,
+    build_indexes,
+    create_partitioned_table,
+    create_table,
+    partitioned_chunk,
+    prepare_upsert_table,
+    upsert_chunk,
+)
+
 
 DTYPE = {
     "VendorID": "Int64",
@@ -29,6 +46,87 @@ PARSE_DATES = [
 ]
 
 
+GREEN_DTYPE = {
+    **DTYPE,
+    "ehail_fee": "float64",
+    "trip_type": "Int64"
+}
+
+GREEN_PARSE_DATES = [
+    "lpep_pickup_datetime",
+    "lpep_dropoff_datetime"
+]
+
+TAXI_SCHEMAS = {
+    "yellow": (DTYPE, PARSE_DATES),
+    "green": (GREEN_DTYPE, GREEN_PARSE_DATES),
+}
+
+URL_PREFIX = os.environ.get(
+    'TLC_URL_PREFIX',
+    'https://github.com/DataTalksClub/nyc-tlc-data/releases/download'
+)
+
+
+def source_url(taxi: str, year: int, month: int) -> str:
+    """Build the TLC release URL for one month of taxi data."""
+    return f'{URL_PREFIX}/{taxi}/{taxi}_tripdata_{year}-{month:02d}.csv.gz'
+
+
+def database_url(user: str, password: str, host: str, port: str, db: str) -> str:
+    return f"postgresql://{user}:{password}@{host}:{port}/{db}"
+
+
+def key_columns(taxi: str) -> list[str]:
+    """Trip identity columns hashed into the upsert row key."""
+    _, parse_dates = TAXI_SCHEMAS[taxi]
+    return ["VendorID", *parse_dates, "PULocationID", "DOLocationID"]
+
+
+def ingest(engine, source: str, table: str, taxi: str = 'yellow', chunksize: int = 100000,
+           reader: str = 'pandas', writer: str = 'copy-csv', workers: int = 1,
+           if_exists: str = 'replace', partition: bool = False, build_index: bool = True,
+           progress: bool = True, metrics: ChunkMetrics | None = None) -> int:
+    """
+    Read one taxi file chunk by chunk and load it into the table. Returns rows written.
+
+    if_exists is 'replace', 'append' or 'upsert'; upsert skips rows whose
+    row key is already in the table, so a rerun only adds missing rows.
+    With partition the table is range-partitioned by pickup month, and
+    (unless build_index is False) indexed once the load has finished.
+    Per-chunk rows, bytes and parse/cast/write times are recorded on
+    metrics, if given, along with the time spent indexing.
+    """
+    metrics = metrics or ChunkMetrics()
+    dtype, parse_dates = TAXI_SCHEMAS[taxi]
+    df_iter = metrics.instrument_chunks(READERS[reader](source, chunksize, dtype, parse_dates))
+    if progress:
+        df_iter = tqdm(df_iter, desc="Processing chunks")
+
+    partition_column = parse_dates[0] if partition else None
+    write_chunk = WRITERS[writer]
+    on_table_ready = None
+    if if_exists == 'upsert':
+        write_chunk = partial(upsert_chunk, write_chunk=write_chunk, key_columns=key_columns(taxi),
+                              partition_column=partition_column)
+        on_table_ready = partial(prepare_upsert_table, key_columns=key_columns(taxi),
+                                 partition_column=partition_column)
+        if_exists = 'append'
+
+    create = create_table
+    if partition:
+        write_chunk = partial(partitioned_chunk, write_chunk=write_chunk, partition_column=partition_column)
+        create = partial(create_partitioned_table, partition_column=partition_column)
+
+    total_rows = load_chunks(df_iter, table, engine, metrics.instrument_writer(write_chunk), workers=workers,
+                             if_exists=if_exists, on_table_ready=on_table_ready, create=create)
+
+    if partition and build_index:
+        with metrics.timer.time("index"):
+            build_indexes(engine, table, partition_column)
+    return total_rows
+
+
 @click.command()
 @click.option('--user', default='root', help='PostgreSQL username')
 @click.option('--password', default='root', help='PostgreSQL password')
@@ -36,39 +134,59 @@ PARSE_DATES = [
 @click.option('--port', default='5432', help='PostgreSQL port')
 @click.option('--db', default='ny_taxi', help='PostgreSQL database name')
 @click.option('--table', default='yellow_taxi_data', help='Target table name')
+@click.option('--if-exists', default='replace', type=click.Choice(['replace', 'append', 'upsert']),
+              help='What to do with an existing table (upsert skips rows already loaded)')
+@click.option('--partition', is_flag=True, help='Range-partition the table by pickup month and index it after the load')
+@click.option('--taxi', default='yellow', type=click.Choice(list(TAXI_SCHEMAS)), help='Taxi type')
 @click.option('--year', default=2021, type=int, help='Year of taxi data')
 @click.option('--month', default=1, type=int, help='Month of taxi data (1-12)')
 @click.option('--chunksize', default=100000, type=int, help='Chunk size for batch inserts')
-def main(user, password, host, port, db, table, year, month, chunksize):
-    """Ingest NYC Yellow Taxi data into PostgreSQL database."""
-    
-    prefix = 'https://github.com/DataTalksClub/nyc-tlc-data/releases/download/yellow/'
-    url = f'{prefix}yellow_tripdata_{year}-{month:02d}.csv.gz'
+@click.option('--reader', default='pandas', type=click.Choice(list(READERS)), help='CSV reader engine')
+@click.option('--writer', default='copy-csv', type=click.Choice(list(WRITERS)), help='Writer backend for each chunk')
+@click.option('--workers', default=1, type=click.IntRange(min=1), help='Parallel writer connections (1 = serial)')
+@click.option('--cache-dir', default=DEFAULT_CACHE_DIR, show_default=True, help='Download cache directory')
+@click.option('--cache-max-gb', default=20.0, type=float, help='Download cache size cap in GB (LRU eviction)')
+@click.option('--no-cache', is_flag=True, help='Stream straight from the URL without caching')
+@click.option('--source', default=None, help='Local file or URL to load instead of the TLC release for --year/--month')
+@click.option('--stats-file', default=None, type=click.Path(dir_okay=False), help='Write a JSON run summary with per-stage timings')
+@click.option('--metrics-file', default=None, type=click.Path(dir_okay=False), help='Append one JSON line of rows/bytes/timings per chunk')
+@click.option('--prom-file', default=None, type=click.Path(dir_okay=False), help='Write run totals as a Prometheus textfile (node_exporter)')
+def main(user, password, host, port, db, table, if_exists, partition, taxi, year, month, chunksize, reader, writer, workers,
+         cache_dir, cache_max_gb, no_cache, source, stats_file, metrics_file, prom_file):
+    """Ingest NYC Yellow/Green Taxi data into PostgreSQL database."""
+    start = time.perf_counter()
+    metrics = ChunkMetrics(metrics_file, labels={"table": table, "writer": writer})
     
     click.echo(f"Connecting to PostgreSQL at {host}:{port}/{db}")
-    engine = create_engine(f"postgresql://{user}:{password}@{host}:{port}/{db}")
+    engine = create_engine(database_url(user, password, host, port, db), pool_size=workers)
     
-    click.echo(f"Downloading data from: {url}")
-    df_iter = pd.read_csv(
-        url,
-        dtype=DTYPE,
-        parse_dates=PARSE_DATES,
-        iterator=True,
-        chunksize=chunksize
-    )
-
-    first = True
-    total_rows = 0
+    if source is None:
+        source = source_url(taxi, year, month)
+        if not no_cache:
+            with metrics.timer.time("download"):
+                source = fetch(source, cache_dir=cache_dir, max_bytes=int(cache_max_gb * 1024 ** 3))
 
-    click.echo(f"Ingesting data into table '{table}'...")
-    for df_chunk in tqdm(df_iter, desc="Processing chunks"):
-        if first:
-            df_chunk.to_sql(name=table, con=engine, if_exists='replace', index=False)
-            first = False
-        else:
-            df_chunk.to_sql(name=table, con=engine, if_exists='append', index=False)
-        total_rows += len(df_chunk)
+    click.echo(f"Reading data from: {source} ('{reader}' reader)")
+    click.echo(f"Ingesting data into table '{table}' using '{writer}' writer with {workers} worker(s)...")
+    total_rows = ingest(
+        engine,
+        source,
+        table,
+        taxi=taxi,
+        chunksize=chunksize,
+        reader=reader,
+        writer=writer,
+        workers=workers,
+        if_exists=if_exists,
+        partition=partition,
+        metrics=metrics,
+    )
+    metrics.close()
 
+    if stats_file:
+        write_stats(stats_file, total_rows, time.perf_counter() - start, metrics.timer)
+    if prom_file:
+        metrics.write_prometheus(prom_file, time.perf_counter() - start)
     click.echo(f"✅ Successfully ingested {total_rows:,} rows into '{table}'")
 
 
@@ -0,0 +1,102 @@
+import queue
+import threading
+
+from writers import create_table
+
+
+_DONE = object()
+
+
+def _chain(first_chunk, chunks):
+    """Yield the already-read first chunk followed by the rest of the iterator."""
+    yield first_chunk
+    yield from chunks
+
+
+def _put(chunks_queue: queue.Queue, item, stop: threading.Event) -> bool:
+    """Block until the item is queued, giving up if a writer has failed."""
+    while not stop.is_set():
+        try:
+            chunks_queue.put(item, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _writer_worker(chunks_queue, table, engine, write_chunk, stop, errors):
+    """Write chunks from the queue until the sentinel arrives or another worker fails."""
+    while not stop.is_set():
+        try:
+            df_chunk = chunks_queue.get(timeout=0.5)
+        except queue.Empty:
+            continue
+        if df_chunk is _DONE:
+            return
+        try:
+            with engine.begin() as conn:
+                write_chunk(df_chunk, table, conn)
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+            return
+
+
+def load_chunks(chunks, table: str, engine, write_chunk, workers: int = 1, if_exists: str = "replace",
+                on_table_ready=None, create=create_table) -> int:
+    """
+    Create the table from the first chunk (with create) and write every chunk into it.
+    on_table_ready(engine, table), if given, runs once after the table exists.
+
+    With workers > 1 the caller's thread keeps decoding while a pool of writer
+    threads, each holding its own pooled connection, drains a bounded queue.
+    At most 2 * workers + 1 chunks are held in memory at any time.
+    Returns the number of rows written.
+    """
+    chunks = iter(chunks)
+    first_chunk = next(chunks, None)
+    if first_chunk is None:
+        return 0
+    create(first_chunk, table, engine, if_exists=if_exists)
+    if on_table_ready is not None:
+        on_table_ready(engine, table)
+
+    if workers <= 1:
+        total_rows = 0
+        for df_chunk in _chain(first_chunk, chunks):
+            with engine.begin() as conn:
+                write_chunk(df_chunk, table, conn)
+            total_rows += len(df_chunk)
+        return total_rows
+
+    chunks_queue = queue.Queue(maxsize=workers)
+    stop = threading.Event()
+    errors = []
+    threads = [
+        threading.Thread(
+            target=_writer_worker,
+            args=(chunks_queue, table, engine, write_chunk, stop, errors),
+            name=f"writer-{i}",
+            daemon=True,
+        )
+        for i in range(workers)
+    ]
+    for t in threads:
+        t.start()
+
+    total_rows = 0
+    try:
+        for df_chunk in _chain(first_chunk, chunks):
+            if not _put(chunks_queue, df_chunk, stop):
+                break
+            total_rows += len(df_chunk)
+    finally:
+        for _ in threads:
+            if not _put(chunks_queue, _DONE, stop):
+                break
+        for t in threads:
+            t.join()
+
+    if errors:
+        raise errors[0]
+    return total_rows
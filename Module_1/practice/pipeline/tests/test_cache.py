@@ -0,0 +1,153 @@
+import hashlib
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import cache
+
+
+class FileServer:
+    """Serves in-memory files with an ETag, answering conditional requests with 304."""
+
+    def __init__(self):
+        self.files = {}
+        self.requests = []
+
+    def url(self, path: str) -> str:
+        host, port = self.httpd.server_address
+        return f"http://{host}:{port}{path}"
+
+    def __enter__(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests.append((self.path, self.headers.get("If-None-Match")))
+                if self.path not in server.files:
+                    self.send_error(404)
+                    return
+                body = server.files[self.path]
+                etag = f'"{hashlib.md5(body).hexdigest()}"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def server():
+    with FileServer() as server:
+        yield server
+
+
+def test_fetch_downloads_into_cache(server, tmp_path):
+    server.files["/yellow_2021-01.csv.gz"] = b"first month"
+
+    path = cache.fetch(server.url("/yellow_2021-01.csv.gz"), cache_dir=str(tmp_path))
+
+    assert path.endswith(".csv.gz")
+    with open(path, "rb") as f:
+        assert f.read() == b"first month"
+    assert server.requests == [("/yellow_2021-01.csv.gz", None)]
+
+
+def test_fetch_revalidates_with_etag(server, tmp_path, capsys):
+    server.files["/month.csv.gz"] = b"unchanged"
+    url = server.url("/month.csv.gz")
+
+    first = cache.fetch(url, cache_dir=str(tmp_path))
+    second = cache.fetch(url, cache_dir=str(tmp_path))
+
+    assert second == first
+    _, revalidation = server.requests
+    assert revalidation[1] is not None
+    assert "not modified" in capsys.readouterr().out
+    assert len(os.listdir(tmp_path / "blobs")) == 1
+
+
+def test_fetch_replaces_changed_file(server, tmp_path):
+    server.files["/month.csv.gz"] = b"old"
+    url = server.url("/month.csv.gz")
+    old_path = cache.fetch(url, cache_dir=str(tmp_path))
+
+    server.files["/month.csv.gz"] = b"new contents"
+    new_path = cache.fetch(url, cache_dir=str(tmp_path))
+
+    assert new_path != old_path
+    assert not os.path.exists(old_path)
+    with open(new_path, "rb") as f:
+        assert f.read() == b"new contents"
+
+
+def test_fetch_uses_cached_copy_when_server_is_down(server, tmp_path):
+    server.files["/month.csv.gz"] = b"cached"
+    url = server.url("/month.csv.gz")
+    path = cache.fetch(url, cache_dir=str(tmp_path))
+    server.httpd.shutdown()
+    server.httpd.server_close()
+
+    assert cache.fetch(url, cache_dir=str(tmp_path)) == path
+
+
+def test_fetch_evicts_least_recently_used(server, tmp_path):
+    for name in ("a", "b", "c"):
+        server.files[f"/{name}.csv.gz"] = name.encode() * 100
+    cache_dir = str(tmp_path)
+
+    path_a = cache.fetch(server.url("/a.csv.gz"), cache_dir=cache_dir, max_bytes=250)
+    path_b = cache.fetch(server.url("/b.csv.gz"), cache_dir=cache_dir, max_bytes=250)
+    # Using a again makes b the least recently used entry
+    cache.fetch(server.url("/a.csv.gz"), cache_dir=cache_dir, max_bytes=250)
+    path_c = cache.fetch(server.url("/c.csv.gz"), cache_dir=cache_dir, max_bytes=250)
+
+    assert os.path.exists(path_a)
+    assert not os.path.exists(path_b)
+    assert os.path.exists(path_c)
+    assert cache._read_entry(cache_dir, server.url("/b.csv.gz")) is None
+
+
+def test_fetch_keeps_requested_file_even_if_over_budget(server, tmp_path):
+    server.files["/big.csv.gz"] = b"x" * 1000
+
+    path = cache.fetch(server.url("/big.csv.gz"), cache_dir=str(tmp_path), max_bytes=10)
+
+    assert os.path.exists(path)
+
+
+def test_evict_skips_entries_another_process_removed(server, tmp_path, monkeypatch):
+    for name in ("a", "b", "c"):
+        server.files[f"/{name}.csv.gz"] = name.encode() * 100
+    cache_dir = str(tmp_path)
+    paths = {name: cache.fetch(server.url(f"/{name}.csv.gz"), cache_dir=cache_dir) for name in ("a", "b", "c")}
+
+    # Another backfill worker evicts a between this process listing the index and removing it
+    stale = [cache._load_entries(cache_dir)]
+    load_entries = cache._load_entries
+    monkeypatch.setattr(cache, "_load_entries", lambda d: stale.pop() if stale else load_entries(d))
+    os.remove(cache._index_path(cache_dir, server.url("/a.csv.gz")))
+    os.remove(paths["a"])
+
+    cache.evict(cache_dir, max_bytes=100)
+
+    assert not os.path.exists(paths["b"])
+    assert os.path.exists(paths["c"])
+
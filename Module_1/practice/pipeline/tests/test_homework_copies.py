@@ -0,0 +1,15 @@
+import os
+
+import pytest
+
+PIPELINE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HOMEWORK_DIR = os.path.join(PIPELINE_DIR, os.pardir, os.pardir, "Homework_1")
+
+
+@pytest.mark.parametrize("module", ["writers.py", "metrics.py"])
+def test_homework_copy_matches_pipeline(module):
+    with open(os.path.join(PIPELINE_DIR, module), "rb") as f:
+        pipeline = f.read()
+    with open(os.path.join(HOMEWORK_DIR, module), "rb") as f:
+        homework = f.read()
+    assert homework == pipeline, f"Homework_1/{module} is out of sync with practice/pipeline/{module}"
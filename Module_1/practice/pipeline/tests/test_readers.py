@@ -0,0 +1,67 @@
+import gzip
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import readers
+from ingest_data import TAXI_SCHEMAS
+
+CSV = (
+    "VendorID,tpep_pickup_datetime,tpep_dropoff_datetime,passenger_count,PULocationID,DOLocationID\n"
+    "1,2021-01-01 00:30:10,2021-01-01 00:36:12,1,142,43\n"
+    "2,2021-01-01 00:51:20,2021-01-01 00:52:19,1,238,151\n"
+).encode()
+
+
+@pytest.fixture
+def server():
+    """Serves /month.csv.gz, and /stalled.csv.gz which never answers."""
+    release = threading.Event()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/stalled.csv.gz":
+                release.wait(10)
+                return
+            body = gzip.compress(CSV)
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    release.set()
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def schema():
+    dtype, parse_dates = TAXI_SCHEMAS["yellow"]
+    columns = CSV.decode().split("\n", 1)[0].split(",")
+    return {c: t for c, t in dtype.items() if c in columns}, parse_dates
+
+
+@pytest.mark.parametrize("reader", list(readers.READERS))
+def test_reader_streams_gzipped_url(server, schema, reader):
+    chunks = list(readers.READERS[reader](f"{server}/month.csv.gz", 10, *schema))
+
+    assert sum(len(chunk) for chunk in chunks) == 2
+    assert chunks[0]["PULocationID"].tolist() == [142, 238]
+
+
+@pytest.mark.parametrize("reader", list(readers.READERS))
+def test_reader_times_out_on_stalled_url(server, schema, reader, monkeypatch):
+    monkeypatch.setattr(readers, "TIMEOUT", 0.5)
+    start = time.perf_counter()
+
+    with pytest.raises(TimeoutError):
+        list(readers.READERS[reader](f"{server}/stalled.csv.gz", 10, *schema))
+    assert time.perf_counter() - start < 5
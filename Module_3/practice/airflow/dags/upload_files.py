@@ -1,14 +1,11 @@
 from airflow.decorators import dag, task
 from datetime import datetime
 
-# Import from plugin (Airflow auto-discovers plugins/ folder)
-from gcs_helpers import (
-    download_parquet,
-    check_bucket,
-    verify_upload,
-    push_to_gcs,
-    BUCKET_NAME,
-)
+# Import from plugin (Airflow auto-discovers plugins/ folder). Only the light
+# config is imported here; tasks import the GCS helpers when they run.
+from gcs_helpers.config import BUCKET_NAME
+
+MONTHS_TO_LOAD = list(range(1, 7))
 
 
 @dag(
@@ -21,19 +18,23 @@ def upload_files():
 
     @task
     def ensure_bucket():
+        from gcs_helpers import check_bucket
         check_bucket(BUCKET_NAME)
         return True
 
     @task
     def download_files(bucket_ready: bool):
-        for i in range(1, 7):
-            download_parquet(i)
+        from gcs_helpers import download_many
+        failed = download_many(MONTHS_TO_LOAD)
+        if failed:
+            raise Exception(f"Failed to download months {failed}")
         return True
 
     @task
     def upload_to_gcs(files_downloaded: bool):
-        for i in range(1, 7):
-            push_to_gcs(i)
+        from gcs_helpers import push_many_to_gcs
+        if not push_many_to_gcs(MONTHS_TO_LOAD):
+            raise Exception("Failed to upload yellow taxi data to GCS")
         return True
 
     # Define task dependencies
@@ -1,17 +1,30 @@
-from gcs_helpers.modules import (
-    download_parquet,
-    check_bucket,
-    verify_upload,
-    push_to_gcs,
-    BUCKET_NAME,
-    MONTHS,
-)
+import importlib
 
-__all__ = [
-    "download_parquet",
-    "check_bucket", 
-    "verify_upload",
-    "push_to_gcs",
-    "BUCKET_NAME",
-    "MONTHS",
-]
+# Public name -> submodule defining it. Submodules load on first access, so
+# importing the package while the scheduler parses a DAG does not pull in the
+# Google Cloud SDK; tasks pay that cost when they run.
+_EXPORTS = {
+    "download_parquet": "modules",
+    "download_many": "modules",
+    "check_bucket": "modules",
+    "verify_upload": "modules",
+    "push_to_gcs": "modules",
+    "push_many_to_gcs": "modules",
+    "BUCKET_NAME": "config",
+    "MONTHS": "config",
+    "upload_many": "transfer",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f"{__name__}.{_EXPORTS[name]}"), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(__all__)
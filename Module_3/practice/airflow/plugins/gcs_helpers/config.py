@@ -0,0 +1,8 @@
+# Configuration shared by the helpers and the DAGs. Kept free of heavy imports
+# so DAG files can read it at parse time.
+BASE_URL = "https://d37ci6vzurychx.cloudfront.net/trip-data/yellow_tripdata_2024-"
+MONTHS = [f"{i:02d}" for i in range(1, 7)]
+DOWNLOAD_DIR = "/tmp"
+CHUNK_SIZE = 8 * 1024 * 1024
+BUCKET_NAME = 'de-zoomcamp-485104-bucket'
+CREDENTIALS_FILE = "/opt/airflow/keys/service-account.json"
@@ -1,20 +1,23 @@
 import os
 import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from google.auth.credentials import AnonymousCredentials
 from google.cloud import storage
 from google.api_core.exceptions import Forbidden
-import time
 
-# Configuration
-BASE_URL = "https://d37ci6vzurychx.cloudfront.net/trip-data/yellow_tripdata_2024-"
-MONTHS = [f"{i:02d}" for i in range(1, 7)]
-DOWNLOAD_DIR = "/tmp"
-CHUNK_SIZE = 8 * 1024 * 1024
-BUCKET_NAME = 'de-zoomcamp-485104-bucket'
-CREDENTIALS_FILE = "/opt/airflow/keys/service-account.json"
+from gcs_helpers.config import BASE_URL, MONTHS, DOWNLOAD_DIR, BUCKET_NAME, CREDENTIALS_FILE
+from gcs_helpers.transfer import UPLOAD_WORKERS, list_existing, upload_many
 
 
 def get_client() -> storage.Client:
-    """Get authenticated GCS client."""
+    """
+    Get authenticated GCS client.
+
+    Anonymous when STORAGE_EMULATOR_HOST points at a local emulator such as
+    gcp-storage-emulator, which the tests run against.
+    """
+    if "STORAGE_EMULATOR_HOST" in os.environ:
+        return storage.Client(project="test", credentials=AnonymousCredentials())
     return storage.Client.from_service_account_json(CREDENTIALS_FILE)
 
 
@@ -34,11 +37,10 @@ def download_parquet(month: int) -> str | None:
 def check_bucket(bucket_name: str) -> bool:
     """Check if bucket exists, create if not."""
     client = get_client()
-    all_buckets = [b.id for b in client.list_buckets()]
-    if bucket_name in all_buckets:
-        print(f"Bucket - {bucket_name} already exists.")
-        return True
     try:
+        if client.lookup_bucket(bucket_name) is not None:
+            print(f"Bucket - {bucket_name} already exists.")
+            return True
         client.create_bucket(bucket_name)
         print(f"Created bucket '{bucket_name}'")
         return True
@@ -56,55 +58,59 @@ def verify_upload(month: int) -> bool:
     return blob.exists()
 
 
-def push_to_gcs(month: int, max_retries: int = 3) -> bool:
-    """Upload parquet file to GCS bucket. Returns True if successful."""
-    client = get_client()
-    blob_name = f"yellow_tripdata_2024-{MONTHS[month-1]}.parquet"
-    file_path = os.path.join(DOWNLOAD_DIR, blob_name)
-    
-    # 1. Check if file already exists in bucket
-    if verify_upload(month):
-        print(f"Blob - {blob_name} already exists in bucket. Skipping.")
-        # Clean up local file if it exists
-        if os.path.exists(file_path):
-            os.remove(file_path)
-        return True
-    
-    # 2. Ensure local file exists (download if needed)
-    if not os.path.exists(file_path):
-        print(f"File {blob_name} not found locally. Downloading...")
-        if download_parquet(month) is None:
-            print(f"Failed to download {blob_name}. Aborting.")
-            return False
-    
-    # 3. Ensure bucket exists
+def download_many(months: list[int], workers: int = UPLOAD_WORKERS) -> list[int]:
+    """Download several months concurrently. Returns the months that failed."""
+    with ThreadPoolExecutor(max_workers=min(workers, len(months))) as pool:
+        paths = list(pool.map(download_parquet, months))
+    return [month for month, path in zip(months, paths) if path is None]
+
+
+def push_many_to_gcs(months: list[int], workers: int = UPLOAD_WORKERS, max_retries: int = 3) -> bool:
+    """Upload several months' parquet files concurrently. Returns True if all succeeded."""
+    blob_names = {month: f"yellow_tripdata_2024-{MONTHS[month-1]}.parquet" for month in months}
+    file_paths = {month: os.path.join(DOWNLOAD_DIR, blob_names[month]) for month in months}
+
+    # 1. Ensure bucket exists
     if not check_bucket(BUCKET_NAME):
         return False
-    
-    # 4. Upload with retries
-    bucket = client.bucket(BUCKET_NAME)
-    blob = bucket.blob(blob_name)
-    blob.chunk_size = CHUNK_SIZE
-    
-    for attempt in range(1, max_retries + 1):
-        try:
-            print(f"Uploading {blob_name} (attempt {attempt}/{max_retries})...")
-            blob.upload_from_filename(file_path)
-            
-            # Verify upload succeeded
-            if verify_upload(month):
-                print(f"✓ {blob_name} uploaded successfully.")
-                os.remove(file_path)
-                return True
-            else:
-                print(f"Verification failed for {blob_name}.")
-                
-        except Exception as e:
-            print(f"Upload error for {blob_name}: {e}")
-        
-        if attempt < max_retries:
-            print(f"Retrying in 5 seconds...")
-            time.sleep(5)
-    
-    print(f"✗ Failed to upload {blob_name} after {max_retries} attempts.")
-    return False
+
+    # 2. One listing for the whole batch. Months without a local copy are
+    #    skipped if already uploaded; local copies are checksummed against it.
+    bucket = get_client().bucket(BUCKET_NAME)
+    existing = list_existing(bucket, "yellow_tripdata_2024-")
+    pending = []
+    for month in months:
+        if not os.path.exists(file_paths[month]) and blob_names[month] in existing:
+            print(f"Blob - {blob_names[month]} already exists in bucket. Skipping.")
+        else:
+            pending.append(month)
+    if not pending:
+        return True
+
+    # 3. Ensure local files exist (download missing ones concurrently)
+    missing = [m for m in pending if not os.path.exists(file_paths[m])]
+    if missing:
+        print(f"Downloading {len(missing)} missing file(s)...")
+        failed = download_many(missing, workers)
+        if failed:
+            print(f"Failed to download months {failed}. Aborting.")
+            return False
+
+    # 4. Upload concurrently with per-file retries; checksums come back with each upload
+    jobs = [(file_paths[m], blob_names[m]) for m in pending]
+    results = upload_many(bucket, jobs, workers=workers, max_retries=max_retries, existing=existing)
+
+    ok = True
+    for month, result in zip(pending, results):
+        if result["status"] == "failed":
+            ok = False
+        else:
+            os.remove(file_paths[month])
+    if not ok:
+        print(f"✗ Failed to upload some files after {max_retries} attempts.")
+    return ok
+
+
+def push_to_gcs(month: int, max_retries: int = 3) -> bool:
+    """Upload parquet file to GCS bucket. Returns True if successful."""
+    return push_many_to_gcs([month], max_retries=max_retries)
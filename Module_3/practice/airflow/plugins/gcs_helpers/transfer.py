@@ -0,0 +1,120 @@
+import base64
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import google_crc32c
+from google.cloud.storage import Blob, Bucket, transfer_manager
+
+from gcs_helpers.config import CHUNK_SIZE
+
+# Transfer configuration
+UPLOAD_WORKERS = 6
+SLICED_UPLOAD_THRESHOLD = 128 * 1024 * 1024
+SLICE_SIZE = 32 * 1024 * 1024
+SLICE_WORKERS = 4
+RETRY_DELAY = 5
+
+
+def sliced_uploads_supported() -> bool:
+    """Sliced uploads use the XML multipart API, which the local GCS emulators do not implement."""
+    return "STORAGE_EMULATOR_HOST" not in os.environ
+
+
+def file_crc32c(file_path: str) -> str:
+    """CRC32C of a local file, base64-encoded the way GCS reports blob.crc32c."""
+    checksum = google_crc32c.Checksum()
+    with open(file_path, "rb") as f:
+        while block := f.read(CHUNK_SIZE):
+            checksum.update(block)
+    return base64.b64encode(checksum.digest()).decode("ascii")
+
+
+def list_existing(bucket: Bucket, prefix: str) -> dict:
+    """Map blob name -> blob (with size and checksums) for everything under prefix, in one listing."""
+    return {blob.name: blob for blob in bucket.list_blobs(prefix=prefix)}
+
+
+def upload_file(bucket: Bucket, file_path: str, blob_name: str) -> Blob:
+    """Upload one file, slicing it into concurrent parts if it is large. Returns the uploaded blob."""
+    blob = bucket.blob(blob_name)
+    if os.path.getsize(file_path) >= SLICED_UPLOAD_THRESHOLD and sliced_uploads_supported():
+        transfer_manager.upload_chunks_concurrently(
+            file_path,
+            blob,
+            chunk_size=SLICE_SIZE,
+            worker_type=transfer_manager.THREAD,
+            max_workers=SLICE_WORKERS,
+        )
+        # The XML multipart API does not return object metadata
+        blob.reload()
+    else:
+        blob.chunk_size = CHUNK_SIZE
+        # The client checks the CRC32C GCS returns and raises DataCorruption on mismatch
+        blob.upload_from_filename(file_path, checksum="crc32c")
+    return blob
+
+
+def _upload_job(bucket: Bucket, file_path: str, blob_name: str, max_retries: int, existing: dict) -> dict:
+    """Upload one (file, blob) job with retries, skipping it if the bucket already has identical bytes."""
+    crc32c = file_crc32c(file_path)
+    result = {"blob": blob_name, "bytes": os.path.getsize(file_path), "attempts": 0}
+    start = time.perf_counter()
+
+    current = existing.get(blob_name)
+    if current is not None and current.crc32c == crc32c:
+        print(f"Blob - {blob_name} already in bucket with matching checksum. Skipping.")
+        result.update(status="skipped", seconds=0.0)
+        return result
+    if current is not None:
+        print(f"Blob - {blob_name} checksum differs from local file. Re-uploading.")
+
+    for attempt in range(1, max_retries + 1):
+        result["attempts"] = attempt
+        try:
+            print(f"Uploading {blob_name} (attempt {attempt}/{max_retries})...")
+            blob = upload_file(bucket, file_path, blob_name)
+            if blob.crc32c != crc32c:
+                raise ValueError(f"checksum mismatch (local {crc32c}, remote {blob.crc32c})")
+            result["status"] = "uploaded"
+            break
+        except Exception as e:
+            print(f"Upload error for {blob_name}: {e}")
+            result["error"] = str(e)
+            if attempt < max_retries:
+                time.sleep(RETRY_DELAY * attempt)
+    else:
+        result["status"] = "failed"
+    result["seconds"] = round(time.perf_counter() - start, 2)
+    return result
+
+
+def upload_many(bucket: Bucket, jobs: list[tuple[str, str]], workers: int = UPLOAD_WORKERS,
+                max_retries: int = 3, existing: dict | None = None) -> list[dict]:
+    """
+    Upload (file_path, blob_name) jobs with at most `workers` running at once.
+
+    The bucket is listed once for the whole batch (or `existing`, a
+    list_existing() result, is reused); jobs whose blob already has the
+    local file's CRC32C are skipped. Each job is retried on its own;
+    one result dict per job is returned in job order with its status
+    ('uploaded', 'skipped' or 'failed'), attempts, bytes and seconds.
+    """
+    if not jobs:
+        return []
+    start = time.perf_counter()
+    if existing is None:
+        existing = list_existing(bucket, os.path.commonprefix([blob_name for _, blob_name in jobs]))
+    with ThreadPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+        results = list(pool.map(lambda job: _upload_job(bucket, *job, max_retries, existing), jobs))
+    elapsed = time.perf_counter() - start
+
+    uploaded = [r for r in results if r["status"] == "uploaded"]
+    skipped = [r for r in results if r["status"] == "skipped"]
+    total_mb = sum(r["bytes"] for r in uploaded) / 1024 ** 2
+    for r in results:
+        mark = "✗" if r["status"] == "failed" else "✓"
+        print(f"{mark} {r['blob']}: {r['status']} in {r['seconds']}s after {r['attempts']} attempt(s)")
+    print(f"Uploaded {len(uploaded)}/{len(results)} file(s) ({len(skipped)} skipped), "
+          f"{total_mb:,.1f} MB in {elapsed:.1f}s")
+    return results
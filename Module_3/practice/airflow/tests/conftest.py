@@ -0,0 +1,45 @@
+import os
+import socket
+import sys
+
+import pytest
+
+# Airflow puts the plugins folder on sys.path; do the same for the tests
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "plugins"))
+
+
+@pytest.fixture(scope="session")
+def gcs_emulator():
+    """An in-memory GCS emulator on a free local port; yields its URL and sets STORAGE_EMULATOR_HOST."""
+    from gcp_storage_emulator.server import create_server
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = create_server("127.0.0.1", port, in_memory=True)
+    server.start()
+    url = f"http://127.0.0.1:{port}"
+    previous = os.environ.get("STORAGE_EMULATOR_HOST")
+    os.environ["STORAGE_EMULATOR_HOST"] = url
+    try:
+        yield url
+    finally:
+        server.stop()
+        if previous is None:
+            del os.environ["STORAGE_EMULATOR_HOST"]
+        else:
+            os.environ["STORAGE_EMULATOR_HOST"] = previous
+
+
+@pytest.fixture
+def bucket(gcs_emulator, request):
+    """A fresh bucket on the emulator for each test."""
+    from google.auth.credentials import AnonymousCredentials
+    from google.cloud import storage
+
+    client = storage.Client(project="test-project", credentials=AnonymousCredentials())
+    bucket = client.create_bucket(request.node.name.replace("_", "-").lower()[:60])
+    yield bucket
+    for blob in bucket.list_blobs():
+        blob.delete()
+    bucket.delete()
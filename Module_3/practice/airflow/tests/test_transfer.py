@@ -0,0 +1,73 @@
+import pytest
+
+from gcs_helpers import transfer
+
+
+@pytest.fixture
+def files(tmp_path):
+    """Two local files to upload, as (file_path, blob_name) jobs."""
+    jobs = []
+    for month in ("01", "02"):
+        path = tmp_path / f"yellow_tripdata_2024-{month}.parquet"
+        path.write_bytes(month.encode() * 50_000)
+        jobs.append((str(path), f"yellow/{path.name}"))
+    return jobs
+
+
+@pytest.fixture(autouse=True)
+def no_retry_delay(monkeypatch):
+    monkeypatch.setattr(transfer, "RETRY_DELAY", 0)
+
+
+def test_sliced_uploads_disabled_on_emulator(gcs_emulator):
+    assert not transfer.sliced_uploads_supported()
+
+
+def test_upload_many_uploads_every_file(bucket, files):
+    results = transfer.upload_many(bucket, files, workers=2)
+
+    assert [r["status"] for r in results] == ["uploaded", "uploaded"]
+    assert [r["blob"] for r in results] == [blob_name for _, blob_name in files]
+    for file_path, blob_name in files:
+        blob = bucket.get_blob(blob_name)
+        assert blob.crc32c == transfer.file_crc32c(file_path)
+        with open(file_path, "rb") as f:
+            assert blob.download_as_bytes() == f.read()
+
+
+def test_upload_many_skips_identical_blobs(bucket, files):
+    transfer.upload_many(bucket, files)
+
+    results = transfer.upload_many(bucket, files)
+
+    assert [r["status"] for r in results] == ["skipped", "skipped"]
+    assert [r["attempts"] for r in results] == [0, 0]
+
+
+def test_upload_many_replaces_changed_blob(bucket, files):
+    transfer.upload_many(bucket, files)
+    file_path, blob_name = files[0]
+    with open(file_path, "wb") as f:
+        f.write(b"corrected month")
+
+    results = transfer.upload_many(bucket, files)
+
+    assert [r["status"] for r in results] == ["uploaded", "skipped"]
+    assert bucket.get_blob(blob_name).download_as_bytes() == b"corrected month"
+
+
+def test_upload_many_reports_failures_after_retries(bucket, files, monkeypatch):
+    def fail(bucket, file_path, blob_name):
+        raise ConnectionError("connection reset")
+
+    monkeypatch.setattr(transfer, "upload_file", fail)
+
+    results = transfer.upload_many(bucket, files, max_retries=2)
+
+    assert [r["status"] for r in results] == ["failed", "failed"]
+    assert [r["attempts"] for r in results] == [2, 2]
+    assert results[0]["error"] == "connection reset"
+
+
+def test_upload_many_without_jobs(bucket):
+    assert transfer.upload_many(bucket, []) == []
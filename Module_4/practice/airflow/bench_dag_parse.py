@@ -0,0 +1,70 @@
+import glob
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+import click
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+# SDKs a DAG file should not need at parse time
+HEAVY_MODULES = ["google.cloud.storage", "google.cloud.bigquery", "requests", "pyarrow", "google_crc32c"]
+
+# Runs in a fresh interpreter per sample. Airflow is imported before the clock
+# starts, as in the scheduler's DAG file processor, which forks with Airflow
+# already loaded; only what the DAG file itself pulls in is timed.
+PROBE = """
+import importlib.util, json, sys, time
+sys.path.insert(0, {plugins!r})
+try:
+    import airflow.sdk
+except ImportError:  # Airflow 2
+    import airflow.decorators, airflow.models
+before = set(sys.modules)
+start = time.perf_counter()
+spec = importlib.util.spec_from_file_location("dag_under_test", {path!r})
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+elapsed = time.perf_counter() - start
+loaded = set(sys.modules) - before
+print(json.dumps({{"seconds": elapsed, "modules": len(loaded), "heavy": [m for m in {heavy!r} if m in loaded]}}))
+"""
+
+
+def _sample(path: str, plugins_folder: str) -> dict:
+    code = PROBE.format(plugins=plugins_folder, path=path, heavy=HEAVY_MODULES)
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                            env={**os.environ, "AIRFLOW__CORE__LOAD_EXAMPLES": "False"})
+    if result.returncode != 0:
+        raise click.ClickException(f"Importing {path} failed:\n{result.stderr.strip()}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+@click.command()
+@click.option('--dags-folder', default=os.path.join(HERE, 'dags'), type=click.Path(exists=True, file_okay=False),
+              help='Folder with the DAG files to time')
+@click.option('--plugins-folder', default=os.path.join(HERE, 'plugins'), type=click.Path(exists=True, file_okay=False),
+              help='Folder Airflow puts on sys.path for the helpers')
+@click.option('--repeat', default=5, type=int, help='Fresh-interpreter imports per DAG file')
+def main(dags_folder, plugins_folder, repeat):
+    """Measure how long each DAG file takes to import, the cost the scheduler pays on every parse loop."""
+    paths = sorted(glob.glob(os.path.join(dags_folder, '*.py')))
+    click.echo(f"Timing {len(paths)} DAG file(s) in {dags_folder} (repeat={repeat})")
+    click.echo(f"{'dag file':<28} {'best (ms)':>10} {'median (ms)':>12} {'modules':>8}  heavy SDKs loaded")
+
+    total = 0.0
+    for path in paths:
+        samples = [_sample(path, plugins_folder) for _ in range(repeat)]
+        timings = [s["seconds"] * 1000 for s in samples]
+        best = min(timings)
+        total += best
+        heavy = ", ".join(samples[0]["heavy"]) or "-"
+        click.echo(f"{os.path.basename(path):<28} {best:>10.1f} {statistics.median(timings):>12.1f} "
+                   f"{samples[0]['modules']:>8}  {heavy}")
+
+    click.echo(f"{'total':<28} {total:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+import contextlib
+import gzip
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import click
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, 'plugins'))
+
+from taxi_helpers.schemas import TAXI_SCHEMAS, get_schema  # noqa: E402  (needs the plugins folder on sys.path)
+
+STAGES = ["download", "upload", "load"]
+
+
+def _months(start_month: str, end_month: str) -> list[tuple[int, int]]:
+    start = datetime.strptime(start_month, "%Y-%m")
+    end = datetime.strptime(end_month, "%Y-%m")
+    months = []
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        months.append((year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def _count_rows(path: str) -> int:
+    """Data rows in a gzipped CSV (TLC files have no quoted newlines)."""
+    with gzip.open(path, "rb") as f:
+        return sum(1 for _ in f) - 1
+
+
+def _timed(log, func, *args, **kwargs) -> tuple[float, object]:
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(log):
+        result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+@click.command()
+@click.option('--taxi', 'taxis', multiple=True, default=['green'], type=click.Choice(list(TAXI_SCHEMAS)),
+              help='Taxi type to run (repeatable)')
+@click.option('--start-month', default='2019-01', help='First month, YYYY-MM')
+@click.option('--end-month', default='2019-03', help='Last month, YYYY-MM')
+@click.option('--rows', default=100_000, type=int, help='Rows per generated month file')
+@click.option('--data-dir', default=None, type=click.Path(file_okay=False),
+              help='Folder served as the TLC site ({taxi}/{file}.csv.gz); missing files are generated. '
+                   'Default: a folder in the work dir')
+@click.option('--gcs-emulator', default='http://localhost:4443', envvar='STORAGE_EMULATOR_HOST', show_default=True,
+              help='fake-gcs-server endpoint, e.g. from: docker run -p 4443:4443 fsouza/fake-gcs-server -scheme http')
+@click.option('--stream/--no-stream', default=False, help='Stream uploads (convert on the fly) instead of download → convert → upload')
+@click.option('--workdir', default=None, type=click.Path(file_okay=False), help='Scratch folder (default: a new temp dir)')
+@click.option('--json-out', default=None, type=click.Path(dir_okay=False), help='Also write the timings as JSON, e.g. for CI')
+@click.option('--verbose', is_flag=True, help='Show the helpers\' own output instead of writing it to pipeline.log')
+def main(taxis, start_month, end_month, rows, data_dir, gcs_emulator, stream, workdir, json_out, verbose):
+    """
+    Run download → push_to_gcs → create_tables end to end without cloud access, timing each stage.
+
+    TLC is replaced by a local HTTP server, GCS by a fake-gcs-server
+    emulator and BigQuery by DuckDB running the generated load SQL. After
+    the run, every month's rows are checked against its source file and
+    the first month is loaded again to check the MERGE adds nothing.
+    """
+    from offline_harness import DuckDBWarehouse, serve_directory, write_synthetic_month
+
+    workdir = workdir or tempfile.mkdtemp(prefix='taxi-offline-')
+    data_dir = data_dir or os.path.join(workdir, 'tlc')
+    download_dir = os.path.join(workdir, 'downloads')
+    os.makedirs(download_dir, exist_ok=True)
+    jobs = [(taxi, year, month) for year, month in _months(start_month, end_month) for taxi in taxis]
+
+    # 1. Source files, generated once and reused by later runs with the same data dir
+    sources = {}
+    for taxi, year, month in jobs:
+        file_name = f"{taxi}_tripdata_{year}-{month:02d}.csv.gz"
+        path = os.path.join(data_dir, taxi, file_name)
+        generated = not os.path.exists(path)
+        if generated:
+            schema = get_schema(taxi)
+            click.echo(f"Generating {file_name} ({rows:,} rows)...")
+            write_synthetic_month(path, schema["columns"], schema["partition_column"], year, month, rows)
+        sources[(taxi, year, month)] = {"file": file_name, "rows": _count_rows(path),
+                                        "bytes": os.path.getsize(path), "generated": generated}
+
+    # 2. Point the helpers at the stand-ins; config reads these when taxi_helpers is first used
+    server, base_url = serve_directory(data_dir)
+    os.environ.update({
+        "TAXI_BASE_URL": base_url,
+        "TAXI_DOWNLOAD_DIR": download_dir,
+        "TAXI_BQ_TELEMETRY_FILE": os.path.join(workdir, 'bq_jobs.jsonl'),
+        "STORAGE_EMULATOR_HOST": gcs_emulator,
+    })
+    from google.auth.credentials import AnonymousCredentials
+    from google.cloud import storage
+    from taxi_helpers import modules
+    from taxi_helpers.config import BUCKET_NAME, DATASET_NAME, PROJECT_ID
+
+    database = os.path.join(workdir, 'warehouse.duckdb')
+    if os.path.exists(database):
+        os.remove(database)
+    storage_client = storage.Client(project=PROJECT_ID, credentials=AnonymousCredentials())
+    warehouse = DuckDBWarehouse(database, storage_client, os.path.join(workdir, 'gcs-cache'))
+    # The helpers look their clients up through these two functions on every call
+    get_clients = modules.get_gcs_client, modules.get_bq_client
+    modules.get_gcs_client = lambda: storage_client
+    modules.get_bq_client = lambda: warehouse
+
+    log = sys.stdout if verbose else open(os.path.join(workdir, 'pipeline.log'), 'w')
+    results = []
+    try:
+        # 3. Start from an empty bucket for these months, so every upload really happens
+        _timed(log, modules.check_bucket, BUCKET_NAME)
+        bucket = storage_client.bucket(BUCKET_NAME)
+        for taxi, year, month in jobs:
+            blob = bucket.get_blob(f"{taxi}_tripdata_{year}-{month:02d}.parquet")
+            if blob is not None:
+                blob.delete()
+
+        # 4. The pipeline, one month at a time as the monthly DAGs run it
+        click.echo(f"Running {len(jobs)} month(s) against {base_url}, {gcs_emulator} and {database}")
+        for taxi, year, month in jobs:
+            timings = {}
+            if not stream:
+                timings["download"], ok = _timed(log, modules.download_file, taxi, month, year)
+                if not ok:
+                    raise click.ClickException(f"Download of {taxi} {year}-{month:02d} failed; see {log.name}")
+            timings["upload"], ok = _timed(log, modules.push_to_gcs, taxi, month, year, stream=stream)
+            if not ok:
+                raise click.ClickException(f"Upload of {taxi} {year}-{month:02d} failed; see {log.name}")
+            timings["load"], _ = _timed(log, modules.create_tables, taxi, year, month)
+            results.append({"taxi": taxi, "month": f"{year}-{month:02d}", **sources[(taxi, year, month)],
+                            "seconds": timings})
+
+        # 5. Checks: rows per month match the source, and a repeated load merges nothing
+        for result in results:
+            master = f"{PROJECT_ID}.{DATASET_NAME}.{result['taxi']}_tripdata"
+            [(loaded,)] = warehouse.fetch(f'SELECT COUNT(*) FROM "{master}" WHERE filename = ?', [result["file"]])
+            result["loaded_rows"] = loaded
+            # A trip in a real TLC file may already be in the master from another month's file, under that name
+            result["ok"] = loaded == result["rows"] if result["generated"] else 0 < loaded <= result["rows"]
+        first = results[0]
+        master = f"{PROJECT_ID}.{DATASET_NAME}.{first['taxi']}_tripdata"
+        [(before,)] = warehouse.fetch(f'SELECT COUNT(*) FROM "{master}"')
+        year, month = map(int, first["month"].split("-"))
+        reload_seconds, _ = _timed(log, modules.create_tables, first["taxi"], year, month)
+        [(after,)] = warehouse.fetch(f'SELECT COUNT(*) FROM "{master}"')
+    finally:
+        modules.get_gcs_client, modules.get_bq_client = get_clients
+        warehouse.close()
+        server.shutdown()
+        if log is not sys.stdout:
+            log.close()
+
+    # 6. Report
+    click.echo(f"{'taxi':<7} {'month':<8} {'rows':>9} {'MB':>7} "
+               + " ".join(f"{stage + ' s':>11}" for stage in STAGES) + f" {'total s':>8} {'rows/s':>9}  check")
+    totals = dict.fromkeys(STAGES, 0.0)
+    for result in results:
+        seconds = result["seconds"]
+        total = sum(seconds.values())
+        for stage, value in seconds.items():
+            totals[stage] += value
+        stage_cells = " ".join(f"{seconds[stage]:>11.2f}" if stage in seconds else f"{'-':>11}" for stage in STAGES)
+        click.echo(f"{result['taxi']:<7} {result['month']:<8} {result['rows']:>9,} {result['bytes'] / 1e6:>7.1f} "
+                   f"{stage_cells} {total:>8.2f} {result['rows'] / total:>9,.0f}  "
+                   f"{'✓' if result['ok'] else '✗'} {result['loaded_rows']:,} loaded")
+    all_rows = sum(result["rows"] for result in results)
+    all_seconds = sum(totals.values())
+    stage_cells = " ".join(f"{'-':>11}" if stream and stage == "download" else f"{totals[stage]:>11.2f}"
+                           for stage in STAGES)
+    click.echo(f"{'total':<16} {all_rows:>9,} {sum(r['bytes'] for r in results) / 1e6:>7.1f} "
+               f"{stage_cells} {all_seconds:>8.2f} {all_rows / all_seconds:>9,.0f}")
+    idempotent = before == after
+    click.echo(f"{'✓' if idempotent else '✗'} Reloading {first['taxi']} {first['month']} took {reload_seconds:.2f}s "
+               f"and added {after - before:,} row(s)")
+    click.echo(f"BigQuery-side statement timings: python bq_job_report.py --file {os.environ['TAXI_BQ_TELEMETRY_FILE']}")
+
+    if json_out:
+        with open(json_out, 'w') as f:
+            json.dump({"stream": stream, "months": results, "stage_seconds": totals,
+                       "reload_seconds": reload_seconds, "idempotent": idempotent}, f, indent=2)
+        click.echo(f"Wrote {json_out}")
+
+    if not idempotent or not all(result["ok"] for result in results):
+        raise click.ClickException("End-to-end checks failed")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+import json
+import os
+import statistics
+from collections import defaultdict
+
+import click
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+# On-demand analysis price used for the cost estimate
+USD_PER_TIB = 6.25
+
+GROUPINGS = {
+    "step": lambda row: (row["taxi"], row["step"], row["statement_type"]),
+    "month": lambda row: (row["taxi"], row["month"], row["statement_type"]),
+    "day": lambda row: (row["recorded_at"][:10], row["taxi"], row["statement_type"]),
+}
+HEADERS = {
+    "step": ("taxi", "step", "statement"),
+    "month": ("taxi", "month", "statement"),
+    "day": ("day", "taxi", "statement"),
+}
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, round(pct / 100 * (len(values) - 1)))]
+
+
+def _read_rows(path: str) -> list[dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+@click.command()
+@click.option('--file', 'path', default=os.path.join(HERE, 'logs', 'bq_jobs.jsonl'),
+              type=click.Path(exists=True, dir_okay=False), help='BigQuery telemetry JSONL written by taxi_helpers')
+@click.option('--by', 'grouping', default='step', type=click.Choice(list(GROUPINGS)),
+              help='Group by load step, by data month, or by the day the job ran')
+@click.option('--taxi', default=None, help='Only this taxi type')
+@click.option('--statement', default=None, help='Only this statement type, e.g. MERGE or SCRIPT')
+def main(path, grouping, taxi, statement):
+    """Summarise BigQuery cost and latency per load step (or per month / day) from the job telemetry log."""
+    rows = [
+        row for row in _read_rows(path)
+        if (taxi is None or row["taxi"] == taxi)
+        and (statement is None or row["statement_type"] == statement.upper())
+    ]
+    groups = defaultdict(list)
+    for row in rows:
+        groups[tuple(str(v) for v in GROUPINGS[grouping](row))].append(row)
+
+    click.echo(f"{len(rows):,} job(s) from {path}")
+    click.echo(f"{HEADERS[grouping][0]:<10} {HEADERS[grouping][1]:<14} {HEADERS[grouping][2]:<24} "
+               f"{'jobs':>5} {'GB billed':>10} {'cost $':>8} {'slot s/job':>11} {'p50 s':>7} {'p95 s':>7} {'failed':>6}")
+
+    total_billed = 0
+    for key in sorted(groups):
+        group = groups[key]
+        billed = sum(row["bytes_billed"] or 0 for row in group)
+        total_billed += billed if key[-1] != "SCRIPT" else 0
+        slot_s = statistics.mean((row["slot_ms"] or 0) / 1000 for row in group)
+        elapsed = [row["elapsed_s"] for row in group if row["elapsed_s"] is not None] or [0.0]
+        failed = sum(1 for row in group if row["error"])
+        click.echo(f"{key[0]:<10} {key[1]:<14} {key[2]:<24} {len(group):>5} {billed / 1e9:>10.2f} "
+                   f"{billed / 1024 ** 4 * USD_PER_TIB:>8.2f} {slot_s:>11.1f} "
+                   f"{_percentile(elapsed, 50):>7.1f} {_percentile(elapsed, 95):>7.1f} {failed:>6}")
+
+    # Script totals repeat their statements' bytes, so they are left out of the grand total
+    click.echo(f"Total billed (excluding SCRIPT totals): {total_billed / 1e9:,.2f} GB, "
+               f"~${total_billed / 1024 ** 4 * USD_PER_TIB:,.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,66 +1,12 @@
-from airflow.decorators import dag, task
+"""Airflow DAG: downloads FHV taxi data each month, uploads it to GCS, and merges it into BigQuery."""
 from datetime import datetime
-from pendulum import timezone
-
-from taxi_helpers import (
-    check_bucket,
-    push_to_gcs,
-    create_fhv_tables,
-    BUCKET_NAME,
-)
-
-EST = timezone("America/New_York")
 
+from taxi_helpers.dag_factory import EST, monthly_taxi_dag
 
-@dag(
-    dag_id="fhv_taxi_pipeline",
-    description="Downloads FHV taxi CSV data, uploads to GCS, and creates BigQuery tables",
+monthly_taxi_dag(
+    "fhv",
     schedule="0 9 2 * *",  # 2nd of every month at 9 AM EST
     start_date=datetime(2019, 1, 1, tzinfo=EST),
     end_date=datetime(2020, 1, 1, tzinfo=EST),
     catchup=True,
-    max_active_runs=1,
-    tags=["fhv", "gcs", "bigquery"],
 )
-def fhv_taxi_pipeline():
-
-    @task
-    def ensure_bucket():
-        """Ensure the GCS bucket exists."""
-        check_bucket(BUCKET_NAME)
-        return True
-
-    @task
-    def upload_to_gcs(bucket_ready: bool, **context):
-        """Download FHV taxi file and upload to GCS for this execution month."""
-        execution_date = context["data_interval_start"]
-        year = execution_date.year
-        month = execution_date.month
-        
-        print(f"Processing FHV taxi data for {year}-{month:02d}")
-
-        if not push_to_gcs("fhv", month, year):
-            raise Exception(f"Failed to upload FHV taxi data for {year}-{month:02d}")
-        return True
-
-    @task
-    def create_bq_tables(upload_done: bool, **context):
-        """Create BigQuery external table, tmp table, and merge into master."""
-        execution_date = context["data_interval_start"]
-        year = execution_date.year
-        month = execution_date.month
-        
-        print(f"Creating BQ tables for FHV taxi {year}-{month:02d}")
-
-        if not create_fhv_tables(year, month):
-            raise Exception(f"Failed to create BQ tables for FHV taxi {year}-{month:02d}")
-        return True
-
-    # Task dependencies
-    bucket_ready = ensure_bucket()
-    upload_done = upload_to_gcs(bucket_ready)
-    create_bq_tables(upload_done)
-
-
-# Instantiate the DAG
-fhv_taxi_pipeline()
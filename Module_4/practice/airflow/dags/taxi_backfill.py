@@ -0,0 +1,4 @@
+"""Airflow DAG: backfills a range of months for several taxi types in parallel, throttled by pools."""
+from taxi_helpers.dag_factory import backfill_taxi_dag
+
+backfill_taxi_dag()
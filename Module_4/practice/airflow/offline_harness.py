@@ -0,0 +1,375 @@
+import functools
+import gzip
+import io
+import os
+import random
+import re
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import duckdb
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+from google.api_core.exceptions import BadRequest, NotFound
+from google.cloud import bigquery
+
+# Local stand-ins for the cloud services taxi_helpers talks to, used by
+# bench_offline_pipeline.py: a static file server in place of the TLC release
+# site, and DuckDB in place of BigQuery. GCS is a fake-gcs-server emulator.
+
+# BigQuery column types -> DuckDB types where the names differ in meaning
+DUCKDB_TYPES = {"INTEGER": "BIGINT", "NUMERIC": "DECIMAL(38, 9)", "FLOAT64": "DOUBLE"}
+# DuckDB column types -> the type BigQuery reports in a table schema
+BIGQUERY_TYPES = {"BIGINT": "INTEGER", "VARCHAR": "STRING", "BLOB": "BYTES", "DOUBLE": "FLOAT",
+                  "DECIMAL(38,9)": "NUMERIC", "TIMESTAMP": "TIMESTAMP", "DATE": "DATE", "BOOLEAN": "BOOLEAN"}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# TLC file server
+# ─────────────────────────────────────────────────────────────────────────────
+
+class _RangeHandler(SimpleHTTPRequestHandler):
+    """Static files with single byte-range support, like the release CDN the downloader is written for."""
+
+    def log_message(self, format, *args):
+        pass
+
+    def end_headers(self):
+        self.send_header("Accept-Ranges", "bytes")
+        super().end_headers()
+
+    def send_head(self):
+        match = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        path = self.translate_path(self.path)
+        if match is None or not os.path.isfile(path):
+            return super().send_head()
+        size = os.path.getsize(path)
+        start = int(match[1])
+        end = min(int(match[2]) if match[2] else size - 1, size - 1)
+        if start >= size:
+            self.send_error(416)
+            return None
+        with open(path, "rb") as f:
+            f.seek(start)
+            body = f.read(end - start + 1)
+        self.send_response(206)
+        self.send_header("Content-Type", self.guess_type(path))
+        self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        return io.BytesIO(body)
+
+
+def serve_directory(directory: str) -> tuple[ThreadingHTTPServer, str]:
+    """Serve directory over HTTP on a free local port in a daemon thread. Returns (server, base URL)."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(_RangeHandler, directory=directory))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def write_synthetic_month(path: str, columns: list[tuple], partition_column: str, year: int, month: int,
+                          rows: int, seed: int = 0) -> None:
+    """
+    Write a gzipped TLC-style CSV with rows random trips in the given month.
+
+    columns are the (name, type, description) entries of the taxi schema.
+    Pickup times are spread evenly over the month so every row falls in
+    its month's partitions; the other values are random but reproducible.
+    """
+    rng = random.Random(f"{seed}-{os.path.basename(path)}")
+    start = datetime(year, month, 1, tzinfo=timezone.utc)
+    span = ((start + timedelta(days=32)).replace(day=1) - start).total_seconds()
+    pickups = [int(start.timestamp() + i * span / rows) for i in range(rows)]
+
+    def values(name: str, bq_type: str) -> pa.Array:
+        if name == partition_column:
+            return pa.array(pickups, pa.timestamp("s"))
+        if bq_type == "TIMESTAMP":
+            return pa.array([pickup + 60 + int(rng.random() * 3540) for pickup in pickups], pa.timestamp("s"))
+        if bq_type in ("INT64", "INTEGER"):
+            return pa.array([1 + int(rng.random() * 265) for _ in pickups], pa.int64())
+        if bq_type == "NUMERIC":
+            return pa.array([round(rng.random() * 100, 2) for _ in pickups], pa.float64())
+        return pa.array([f"{name[0].upper()}{int(rng.random() * 1000):05d}" for _ in pickups])
+
+    table = pa.table({name: values(name, bq_type) for name, bq_type, _ in columns})
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with gzip.open(path, "wb", compresslevel=6) as f:
+        pa_csv.write_csv(table, f, pa_csv.WriteOptions(quoting_style="none"))
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# BigQuery SQL → DuckDB
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _extract_literals(sql: str) -> tuple[str, list[str]]:
+    """
+    Replace BigQuery string literals with \\x00<n>\\x00 placeholders and backquoted names with double-quoted ones.
+
+    With the literals out of the way, the remaining code can be split on ';'
+    and matched with regular expressions without tripping over descriptions.
+    """
+    code, literals, i = [], [], 0
+    while i < len(sql):
+        char = sql[i]
+        if char == "'":
+            value, i = [], i + 1
+            while sql[i] != "'":
+                if sql[i] == "\\":
+                    i += 1
+                value.append(sql[i])
+                i += 1
+            code.append(f"\x00{len(literals)}\x00")
+            literals.append("".join(value))
+        elif char == "`":
+            end = sql.index("`", i + 1)
+            code.append(f'"{sql[i + 1:end]}"')
+            i = end
+        else:
+            code.append(char)
+        i += 1
+    return "".join(code), literals
+
+
+def _strip_options(statement: str) -> tuple[str, list[str]]:
+    """Remove every OPTIONS (...) clause; returns the statement and the clauses' contents."""
+    removed = []
+    while (match := re.search(r"\s*\bOPTIONS\s*\(", statement)) is not None:
+        depth, end = 1, match.end()
+        while depth:
+            depth += {"(": 1, ")": -1}.get(statement[end], 0)
+            end += 1
+        removed.append(statement[match.end():end - 1])
+        statement = statement[:match.start()] + statement[end:]
+    return statement, removed
+
+
+def statement_type(statement: str) -> str:
+    """BigQuery's statement_type for a (placeholder) statement, e.g. CREATE_TABLE_AS_SELECT or MERGE."""
+    words = re.sub(r"\bOR REPLACE\b|\bIF (NOT )?EXISTS\b", "", statement.upper()).split()
+    if words[0] == "CREATE":
+        kind = "CREATE_EXTERNAL_TABLE" if words[1] == "EXTERNAL" else "CREATE_TABLE"
+        return kind + ("_AS_SELECT" if re.search(r"\bAS\s+SELECT\b", statement, re.I) else "")
+    if words[0] == "DROP":
+        return "DROP_EXTERNAL_TABLE" if words[1] == "EXTERNAL" else "DROP_TABLE"
+    return words[0]
+
+
+class DuckDBJob:
+    """The parts of a BigQuery QueryJob that taxi_helpers reads, for a statement or script run in DuckDB."""
+
+    def __init__(self, statement_type: str, labels: dict, parent_job_id: str | None = None):
+        self.job_id = f"duckdb_{uuid.uuid4().hex}"
+        self.statement_type = statement_type
+        self.labels = labels
+        self.parent_job_id = parent_job_id
+        self.state = "RUNNING"
+        self.error_result = None
+        self.started = datetime.now(timezone.utc)
+        self.ended = None
+        self.num_dml_affected_rows = None
+        # DuckDB scans local files; there is nothing billed and no slot time to report
+        self.total_bytes_processed = None
+        self.total_bytes_billed = None
+        self.slot_millis = None
+        self.cache_hit = False
+        self._rows = []
+
+    def finish(self, error: Exception | None = None) -> None:
+        self.state = "DONE"
+        self.ended = datetime.now(timezone.utc)
+        if error is not None:
+            self.error_result = {"reason": "invalidQuery", "message": str(error)}
+
+    def reload(self) -> None:
+        pass
+
+    def result(self) -> list[tuple]:
+        if self.error_result:
+            raise BadRequest(self.error_result["message"])
+        return self._rows
+
+
+class DuckDBWarehouse:
+    """
+    BigQuery client stand-in running the generated load SQL in DuckDB.
+
+    Each script is split into statements and each statement becomes a child
+    job, as in BigQuery, so telemetry and report_load_job() work unchanged.
+    Statements are translated only as far as the SQL taxi_helpers generates
+    needs: OPTIONS, PARTITION BY and CLUSTER BY are dropped, script
+    variables become DuckDB variables, STRUCT(...) becomes struct_pack(...)
+    and external tables become views over the Parquet files, fetched from
+    GCS through storage_client. FARM_FINGERPRINT is a DuckDB hash: a stable
+    INT64 key, but not BigQuery's values.
+    """
+
+    def __init__(self, database: str, storage_client, cache_dir: str):
+        self.storage_client = storage_client
+        self.cache_dir = cache_dir
+        self._connection = duckdb.connect(database)
+        self._connection.execute("SET TimeZone = 'UTC'")
+        self._connection.execute(
+            "CREATE OR REPLACE MACRO farm_fingerprint(s) AS CAST(CAST(hash(s) AS HUGEINT) - 9223372036854775808 AS BIGINT)"
+        )
+        self._connection.execute("CREATE OR REPLACE MACRO to_json_string(x) AS CAST(to_json(x) AS VARCHAR)")
+        self._lock = threading.Lock()
+        self._jobs = {}
+        # Table name -> creation time, for list_tables()
+        self._created = {}
+
+    # BigQuery client API ────────────────────────────────────────────────────
+
+    def query(self, sql: str, location: str | None = None, job_config=None) -> DuckDBJob:
+        """Run sql to completion (BigQuery would run it in the background) and return its job."""
+        labels = dict(job_config.labels) if job_config is not None and job_config.labels else {}
+        code, literals = _extract_literals(sql)
+        statements = [part.strip() for part in code.split(";") if part.strip()]
+        if len(statements) == 1:
+            job = DuckDBJob(statement_type(statements[0]), labels)
+            self._jobs[job.job_id] = job
+            self._run(job, statements[0], literals, variables=set())
+            return job
+
+        job = DuckDBJob("SCRIPT", labels)
+        self._jobs[job.job_id] = job
+        variables, error = set(), None
+        for statement in statements:
+            child = DuckDBJob(statement_type(statement), labels, parent_job_id=job.job_id)
+            self._jobs[child.job_id] = child
+            error = self._run(child, statement, literals, variables)
+            if error is not None:
+                break
+        job.finish(error)
+        return job
+
+    def get_job(self, job_id: str, location: str | None = None) -> DuckDBJob:
+        if job_id not in self._jobs:
+            raise NotFound(f"Job {job_id} not found")
+        return self._jobs[job_id]
+
+    def list_jobs(self, parent_job: str | None = None) -> list[DuckDBJob]:
+        jobs = [job for job in self._jobs.values() if parent_job is None or job.parent_job_id == parent_job]
+        return jobs[::-1]  # newest first, like BigQuery
+
+    def get_table(self, table_id: str) -> bigquery.Table:
+        columns = self._connection.execute(
+            "SELECT column_name, data_type FROM duckdb_columns() WHERE table_name = ? ORDER BY column_index",
+            [table_id],
+        ).fetchall()
+        if not columns:
+            raise NotFound(f"Table {table_id} not found")
+        schema = [bigquery.SchemaField(name, BIGQUERY_TYPES.get(data_type.replace(" ", ""), data_type))
+                  for name, data_type in columns]
+        return bigquery.Table(table_id, schema=schema)
+
+    def list_tables(self, dataset_id: str) -> list[SimpleNamespace]:
+        prefix = f"{dataset_id}."
+        return [
+            SimpleNamespace(table_id=name[len(prefix):], created=self._created.get(name, datetime.now(timezone.utc)))
+            for name in self._relations()
+            if name.startswith(prefix)
+        ]
+
+    def delete_table(self, table_id: str, not_found_ok: bool = False) -> None:
+        relations = self._relations()
+        if table_id not in relations:
+            if not not_found_ok:
+                raise NotFound(f"Table {table_id} not found")
+            return
+        with self._lock:
+            self._connection.execute(f'DROP {relations[table_id]} "{table_id}"')
+        self._created.pop(table_id, None)
+
+    # Helpers for the harness ────────────────────────────────────────────────
+
+    def fetch(self, sql: str, parameters: list | None = None) -> list[tuple]:
+        """Run a DuckDB query directly, e.g. to check what a load left in the master table."""
+        with self._lock:
+            return self._connection.execute(sql, parameters or []).fetchall()
+
+    def close(self) -> None:
+        self._connection.close()
+
+    # Translation ────────────────────────────────────────────────────────────
+
+    def _relations(self) -> dict[str, str]:
+        """Table or view name -> TABLE or VIEW."""
+        with self._lock:
+            return dict(self._connection.execute(
+                "SELECT table_name, 'TABLE' FROM duckdb_tables() UNION ALL SELECT view_name, 'VIEW' FROM duckdb_views()"
+            ).fetchall())
+
+    def _local_uri(self, uri: str) -> str:
+        """Copy a gs:// object into the cache folder (as BigQuery reads it from GCS) and return the local path."""
+        bucket_name, _, blob_name = uri.removeprefix("gs://").partition("/")
+        local_path = os.path.join(self.cache_dir, bucket_name, blob_name)
+        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+        self.storage_client.bucket(bucket_name).blob(blob_name).download_to_filename(local_path)
+        return local_path
+
+    def _translate(self, statement: str, literals: list[str], variables: set[str]) -> list[tuple[str, list, list]]:
+        """
+        DuckDB (sql, parameters, assign_to) steps equivalent to one BigQuery statement.
+
+        assign_to names the script variables set from the step's result row;
+        it is empty for ordinary statements.
+        """
+        statement, options = _strip_options(statement)
+        statement = re.sub(r"^\s*(PARTITION|CLUSTER) BY .*$", "", statement, flags=re.M).strip()
+        statement = statement.replace("CURRENT_TIMESTAMP()", "current_timestamp")
+        # STRUCT(a, b) takes its field names from the columns, as struct_pack(a, b) does
+        statement = re.sub(r"\bSTRUCT\(", "struct_pack(", statement)
+        for bq_type, duckdb_type in DUCKDB_TYPES.items():
+            statement = re.sub(rf"\b{bq_type}\b", duckdb_type, statement)
+
+        def render(code: str) -> str:
+            for name in variables:
+                code = re.sub(rf"(?<![\w.]){name}\b", f"getvariable('{name}')", code)
+            return re.sub(r"\x00(\d+)\x00", lambda m: "'" + literals[int(m[1])].replace("'", "''") + "'", code)
+
+        if match := re.fullmatch(r"DECLARE (\w+) \w+", statement):
+            variables.add(match[1])
+            return []
+        if match := re.fullmatch(r"SET \(([^)]*)\) = \(\s*SELECT AS STRUCT ([\s\S]*)\)", statement):
+            return [("SELECT " + render(match[2]), [], [name.strip() for name in match[1].split(",")])]
+        if match := re.fullmatch(r'CREATE OR REPLACE EXTERNAL TABLE ("[^"]+")', statement):
+            uris = re.search(r"uris\s*=\s*\[([^\]]*)\]", options[-1])[1]
+            paths = [self._local_uri(literals[int(index)]) for index in re.findall(r"\x00(\d+)\x00", uris)]
+            # Views cannot take prepared parameters, so the paths are inlined as literals
+            path_list = ", ".join("'" + path.replace("'", "''") + "'" for path in paths)
+            return [(f"CREATE OR REPLACE VIEW {match[1]} AS SELECT * FROM read_parquet([{path_list}])", [], [])]
+        if "EXTERNAL TABLE" in statement and not statement.startswith("DROP EXTERNAL TABLE"):
+            raise BadRequest(f"Unsupported external table statement: {statement[:80]}")
+        statement = re.sub(r"^DROP EXTERNAL TABLE", "DROP VIEW", statement)
+        return [(render(statement), [], [])]
+
+    def _run(self, job: DuckDBJob, statement: str, literals: list[str], variables: set[str]) -> Exception | None:
+        """Execute one statement as job; returns the error it failed with, if any."""
+        try:
+            for sql, parameters, assign_to in self._translate(statement, literals, variables):
+                with self._lock:
+                    rows = self._connection.execute(sql, parameters).fetchall()
+                    for name, value in zip(assign_to, rows[0] if rows else []):
+                        self._connection.execute(f"SET VARIABLE {name} = ?", [value])
+                if job.statement_type in ("INSERT", "MERGE", "DELETE", "UPDATE"):
+                    job.num_dml_affected_rows = rows[0][0] if rows else 0
+                elif not assign_to:
+                    job._rows = rows
+                self._track(sql)
+        except Exception as e:
+            job.finish(e)
+            return e
+        job.finish()
+        return None
+
+    def _track(self, sql: str) -> None:
+        """Keep creation times in step with CREATE and DROP statements."""
+        if match := re.match(r'CREATE (OR REPLACE )?(?:TABLE|VIEW) (IF NOT EXISTS )?"([^"]+)"', sql):
+            if match[1] or match[3] not in self._created:
+                self._created[match[3]] = datetime.now(timezone.utc)
+        elif match := re.match(r'DROP (?:TABLE|VIEW) IF EXISTS "([^"]+)"', sql):
+            self._created.pop(match[1], None)
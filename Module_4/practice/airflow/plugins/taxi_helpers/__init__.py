@@ -1,25 +1,40 @@
-from taxi_helpers.modules import (
-    download_file,
-    get_gcs_client,
-    check_bucket,
-    verify_upload,
-    push_to_gcs,
-    create_green_tables,
-    create_yellow_tables,
-    create_fhv_tables,
-    BUCKET_NAME,
-    PROJECT_ID,
-)
+import importlib
 
-__all__ = [
-    "download_file",
-    "get_gcs_client",
-    "check_bucket",
-    "verify_upload",
-    "push_to_gcs",
-    "create_green_tables",
-    "create_yellow_tables",
-    "create_fhv_tables",
-    "BUCKET_NAME",
-    "PROJECT_ID",
-]
+# Public name -> submodule defining it. Submodules load on first access, so
+# importing the package while the scheduler parses a DAG does not pull in the
+# Google Cloud SDKs, requests or pyarrow; tasks pay that cost when they run.
+_EXPORTS = {
+    "download_file": "modules",
+    "get_gcs_client": "modules",
+    "check_bucket": "modules",
+    "verify_upload": "modules",
+    "push_to_gcs": "modules",
+    "stream_push_to_gcs": "modules",
+    "create_tables": "modules",
+    "submit_load_job": "modules",
+    "get_job_state": "modules",
+    "report_load_job": "modules",
+    "create_master_table": "modules",
+    "sweep_intermediate_tables": "modules",
+    "migrate_master_table": "modules",
+    "create_green_tables": "modules",
+    "create_yellow_tables": "modules",
+    "create_fhv_tables": "modules",
+    "BUCKET_NAME": "config",
+    "PROJECT_ID": "config",
+    "TAXI_SCHEMAS": "schemas",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f"{__name__}.{_EXPORTS[name]}"), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(__all__)
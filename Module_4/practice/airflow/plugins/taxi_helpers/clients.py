@@ -0,0 +1,35 @@
+import os
+import threading
+
+# (client class, key file, pid) -> (client, key file mtime)
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def cached_client(client_class, credentials_file: str):
+    """
+    Return a shared client_class authenticated with the service account key.
+
+    One client (and its pooled HTTP session) is built per process and reused
+    by every caller and thread; the google-auth credentials inside it refresh
+    their token on demand. Keying on the pid keeps forked Celery workers from
+    inheriting the parent's sockets, and a rotated key file (new mtime) builds
+    a fresh client on the next call.
+    """
+    try:
+        mtime = os.path.getmtime(credentials_file)
+    except OSError:
+        mtime = None
+    key = (client_class, credentials_file, os.getpid())
+    with _clients_lock:
+        entry = _clients.get(key)
+        if entry is None or entry[1] != mtime:
+            entry = (client_class.from_service_account_json(credentials_file), mtime)
+            _clients[key] = entry
+        return entry[0]
+
+
+def clear_clients() -> None:
+    """Drop every cached client, e.g. after changing credentials in tests."""
+    with _clients_lock:
+        _clients.clear()
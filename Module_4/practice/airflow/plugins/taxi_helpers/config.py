@@ -0,0 +1,26 @@
+import os
+
+# Configuration shared by the helpers and the DAG factory. Kept free of heavy
+# imports so DAG files can read it at parse time.
+# Source of the TLC files and local staging folder; overridable to run against a local file server
+BASE_URL = os.environ.get("TAXI_BASE_URL", "https://github.com/DataTalksClub/nyc-tlc-data/releases/download")
+DOWNLOAD_DIR = os.environ.get("TAXI_DOWNLOAD_DIR", "/tmp")
+CHUNK_SIZE = 8 * 1024 * 1024
+PROJECT_ID = "de-zoomcamp-485104"
+BUCKET_NAME = "de-zoomcamp-485104-bucket"
+DATASET_NAME = "demo_dataset"
+CREDENTIALS_FILE = "/opt/airflow/keys/service-account.json"
+# Location BigQuery jobs run in (the dataset's location); needed to look a job up by ID
+BQ_LOCATION = os.environ.get("TAXI_BQ_LOCATION", "US")
+# Convert downloads to Parquet on the fly and pipe them straight into GCS instead of staging them in DOWNLOAD_DIR
+STREAM_UPLOADS = os.environ.get("TAXI_STREAM_UPLOADS", "0") == "1"
+# JSONL log of BigQuery job statistics (bytes billed, slot time, latency); empty to disable
+TELEMETRY_FILE = os.environ.get("TAXI_BQ_TELEMETRY_FILE", "/opt/airflow/logs/bq_jobs.jsonl")
+# Month-level intermediates (the _ext and tmp tables of a load) expire after this many hours even if a load fails
+INTERMEDIATE_TTL_HOURS = int(os.environ.get("TAXI_INTERMEDIATE_TTL_HOURS", "72"))
+# Keep the intermediates of the last N loaded months per taxi type for debugging; 0 drops them as each load finishes
+KEEP_INTERMEDIATES = int(os.environ.get("TAXI_KEEP_INTERMEDIATES", "0"))
+# The sweeper leaves tables younger than this alone, so it never drops those of a load still running
+SWEEP_MIN_AGE_HOURS = 2
+# Append-only log (in DATASET_NAME) of when each intermediate table was created and dropped
+MANIFEST_TABLE = "_intermediate_tables"
@@ -0,0 +1,126 @@
+import os
+
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+from taxi_helpers.schemas import get_schema
+
+# Conversion configuration
+CSV_BLOCK_SIZE = 16 * 1024 * 1024
+ROW_GROUP_ROWS = 250_000
+COMPRESSION = "zstd"
+# Values that do not parse are loaded as NULL (as the CSV load's ignore_unknown_values
+# allowed); more than this many in one file means a wrong schema, and the file fails
+MAX_INVALID_VALUES = 1000
+
+# BigQuery column type -> (Arrow type the CSV text is parsed as, Arrow type written to Parquet).
+# Parquet DECIMAL(38, 9) loads as NUMERIC and UTC timestamps as TIMESTAMP.
+# Integer columns sometimes arrive as '1.0', so they are parsed as floats; the
+# cast to int64 still rejects real fractions (which then load as NULL).
+ARROW_TYPES = {
+    "STRING": (pa.string(), pa.string()),
+    "TIMESTAMP": (pa.timestamp("us"), pa.timestamp("us", tz="UTC")),
+    "INT64": (pa.float64(), pa.int64()),
+    "INTEGER": (pa.float64(), pa.int64()),
+    "NUMERIC": (pa.decimal128(38, 9), pa.decimal128(38, 9)),
+}
+
+
+def parquet_schema(taxi: str) -> pa.Schema:
+    """Arrow schema of the converted Parquet file, matching the master table's column types."""
+    return pa.schema([(name, ARROW_TYPES[bq_type][1]) for name, bq_type, _ in get_schema(taxi)["columns"]])
+
+
+def _open_csv(source, taxi: str) -> pa_csv.CSVStreamingReader:
+    # Everything is read as text and cast per column, so one bad value cannot fail a whole block
+    columns = get_schema(taxi)["columns"]
+    return pa_csv.open_csv(
+        source,
+        read_options=pa_csv.ReadOptions(block_size=CSV_BLOCK_SIZE),
+        convert_options=pa_csv.ConvertOptions(
+            column_types={name: pa.string() for name, _, _ in columns},
+            include_columns=[name for name, _, _ in columns],
+            # Older months lack later columns (e.g. congestion_surcharge); fill them with nulls
+            include_missing_columns=True,
+            strings_can_be_null=True,
+        ),
+    )
+
+
+def _cast_value(value: str | None, parse_type: pa.DataType, target_type: pa.DataType):
+    try:
+        return pa.array([value], pa.string()).cast(parse_type).cast(target_type)[0].as_py()
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        return None
+
+
+def _cast_column(values: pa.Array, parse_type: pa.DataType, target_type: pa.DataType) -> tuple[pa.Array, int]:
+    """Cast a text column to its Parquet type, nulling values that do not parse. Returns (array, invalid count)."""
+    try:
+        return values.cast(parse_type).cast(target_type), 0
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        # Rare: redo this column value by value to find the bad ones
+        cast = pa.array([_cast_value(value, parse_type, target_type) for value in values.to_pylist()], target_type)
+        return cast, cast.null_count - values.null_count
+
+
+def csv_to_parquet(source, sink, taxi: str) -> int:
+    """
+    Convert a trip CSV into zstd Parquet with the master-table schema. Returns rows written.
+
+    source is a path (.gz is decompressed) or an Arrow input stream; sink is
+    a path or a writable file object. Batches are streamed into row groups
+    of ROW_GROUP_ROWS rows, so memory stays bounded. A value that does not
+    parse or cast (e.g. a fractional passenger_count) is written as NULL and
+    counted; more than MAX_INVALID_VALUES of them raise ValueError.
+    """
+    if isinstance(source, str):
+        source = pa.input_stream(source, compression="detect")
+    columns = get_schema(taxi)["columns"]
+    schema = parquet_schema(taxi)
+    rows = 0
+    pending = None
+    invalid = {}
+
+    with pq.ParquetWriter(sink, schema, compression=COMPRESSION) as writer:
+        for batch in _open_csv(source, taxi):
+            rows += batch.num_rows
+            arrays = []
+            for name, bq_type, _ in columns:
+                parse_type, target_type = ARROW_TYPES[bq_type]
+                array, bad = _cast_column(batch.column(name), parse_type, target_type)
+                arrays.append(array)
+                if bad:
+                    invalid[name] = invalid.get(name, 0) + bad
+            if sum(invalid.values()) > MAX_INVALID_VALUES:
+                raise ValueError(f"More than {MAX_INVALID_VALUES} values failed to parse: {invalid}")
+            batch = pa.Table.from_arrays(arrays, schema=schema)
+            pending = batch if pending is None else pa.concat_tables([pending, batch])
+            # Write whole row groups only and carry the remainder into the next one
+            full = pending.num_rows // ROW_GROUP_ROWS * ROW_GROUP_ROWS
+            if full:
+                writer.write_table(pending.slice(0, full), row_group_size=ROW_GROUP_ROWS)
+                pending = pending.slice(full)
+        if pending is not None and pending.num_rows:
+            writer.write_table(pending, row_group_size=ROW_GROUP_ROWS)
+
+    if invalid:
+        print(f"Loaded {sum(invalid.values()):,} value(s) that did not parse as NULL: "
+              + ", ".join(f"{name} {count:,}" for name, count in invalid.items()))
+    return rows
+
+
+def convert_file(csv_path: str, taxi: str) -> str:
+    """Convert a downloaded .csv.gz next to itself as .parquet. Returns the Parquet path."""
+    parquet_path = csv_path.removesuffix(".gz").removesuffix(".csv") + ".parquet"
+    tmp_path = f"{parquet_path}.tmp"
+    try:
+        rows = csv_to_parquet(csv_path, tmp_path, taxi)
+        os.replace(tmp_path, parquet_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    print(f"Converted '{os.path.basename(csv_path)}' to Parquet ({rows:,} rows, "
+          f"{os.path.getsize(csv_path) / 1024 ** 2:,.1f} MB -> {os.path.getsize(parquet_path) / 1024 ** 2:,.1f} MB)")
+    return parquet_path
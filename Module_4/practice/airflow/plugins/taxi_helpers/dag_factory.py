@@ -0,0 +1,201 @@
+from datetime import datetime, timedelta
+
+from pendulum import timezone
+
+try:
+    from airflow.sdk import Param, TriggerRule, dag, task, task_group
+except ImportError:  # Airflow 2, as in the docker-compose image
+    from airflow.decorators import dag, task, task_group
+    from airflow.models.param import Param
+    from airflow.utils.trigger_rule import TriggerRule
+
+from taxi_helpers.config import BUCKET_NAME, STREAM_UPLOADS
+from taxi_helpers.operators import BigQueryLoadOperator
+from taxi_helpers.schemas import TAXI_SCHEMAS
+
+EST = timezone("America/New_York")
+# Display names used in descriptions and logs (default: the taxi type itself)
+LABELS = {"fhv": "FHV"}
+
+# Pools throttling backfill tasks; created by airflow-init from pools.json.
+# Task bodies import taxi_helpers.modules themselves, so parsing these DAGs
+# never loads the Google Cloud SDKs.
+DOWNLOAD_POOL = "taxi_download"
+UPLOAD_POOL = "taxi_upload"
+BIGQUERY_POOL = "taxi_bigquery"
+# One slot: a migration renames the master table, so it must never overlap another DAG's preparation
+MASTER_TABLE_POOL = "taxi_master_tables"
+
+
+def monthly_taxi_dag(taxi: str, schedule: str, start_date: datetime, end_date: datetime | None = None,
+                     catchup: bool = False):
+    """Build the scheduled DAG loading one month per run for a taxi type: bucket → GCS upload → BigQuery → sweep."""
+    label = LABELS.get(taxi, taxi)
+
+    @dag(
+        dag_id=f"{taxi}_taxi_pipeline",
+        description=f"Downloads {label} taxi CSV data, uploads to GCS, and creates BigQuery tables",
+        schedule=schedule,
+        start_date=start_date,
+        end_date=end_date,
+        catchup=catchup,
+        max_active_runs=1,
+        tags=[taxi, "gcs", "bigquery"],
+    )
+    def taxi_pipeline():
+
+        @task
+        def ensure_bucket():
+            """Ensure the GCS bucket exists."""
+            from taxi_helpers.modules import check_bucket
+            check_bucket(BUCKET_NAME)
+            return True
+
+        @task
+        def upload_to_gcs(bucket_ready: bool, **context):
+            """Download the taxi file and upload it to GCS for this execution month."""
+            from taxi_helpers.modules import push_to_gcs
+            execution_date = context["data_interval_start"]
+            year = execution_date.year
+            month = execution_date.month
+            print(f"Processing {label} taxi data for {year}-{month:02d}")
+
+            if not push_to_gcs(taxi, month, year):
+                raise Exception(f"Failed to upload {label} taxi data for {year}-{month:02d}")
+            return True
+
+        @task(pool=MASTER_TABLE_POOL)
+        def prepare_master_table():
+            """Migrate the master table to the current key if needed, and create it if missing."""
+            from taxi_helpers.modules import create_master_table, migrate_master_table
+            migrate_master_table(taxi)
+            create_master_table(taxi)
+            return True
+
+        # Create BigQuery external table, tmp table, and merge into master (deferred while the job runs)
+        create_bq_tables = BigQueryLoadOperator(
+            task_id="create_bq_tables",
+            load={"taxi": taxi, "year": "{{ data_interval_start.year }}", "month": "{{ data_interval_start.month }}"},
+        )
+
+        @task(trigger_rule=TriggerRule.ALL_DONE)
+        def sweep_intermediates():
+            """Drop this taxi type's leftover month intermediates, even after a failed load."""
+            from taxi_helpers.modules import sweep_intermediate_tables
+            sweep_intermediate_tables(taxi)
+
+        # Task dependencies
+        bucket_ready = ensure_bucket()
+        upload_done = upload_to_gcs(bucket_ready)
+        [upload_done, prepare_master_table()] >> create_bq_tables >> sweep_intermediates()
+
+    return taxi_pipeline()
+
+
+def _month_range(start_month: str, end_month: str) -> list[tuple[int, int]]:
+    """(year, month) pairs from start_month to end_month inclusive, both given as YYYY-MM."""
+    start = datetime.strptime(start_month, "%Y-%m")
+    end = datetime.strptime(end_month, "%Y-%m")
+    months = []
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        months.append((year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def backfill_taxi_dag(dag_id: str = "taxi_backfill"):
+    """
+    Build a manually triggered DAG backfilling (taxi type, month) pairs in parallel.
+
+    Each pair is one instance of a mapped task group (download → upload →
+    BigQuery load), so a month moves to its next step as soon as its own
+    previous step finishes. The steps run in the download, upload and
+    BigQuery pools, which cap how many of each run at once across the
+    whole backfill. BigQuery loads wait in the triggerer, not a worker slot.
+    """
+
+    @dag(
+        dag_id=dag_id,
+        description="Backfills taxi data for a range of months and taxi types in parallel",
+        schedule=None,
+        start_date=datetime(2019, 1, 1, tzinfo=EST),
+        catchup=False,
+        max_active_runs=1,
+        max_active_tasks=32,
+        default_args={"retries": 2, "retry_delay": timedelta(minutes=2)},
+        params={
+            "taxi_types": Param(list(TAXI_SCHEMAS), type="array", items={"enum": list(TAXI_SCHEMAS)}),
+            "start_month": Param("2019-01", type="string", pattern=r"^\d{4}-\d{2}$"),
+            "end_month": Param("2020-12", type="string", pattern=r"^\d{4}-\d{2}$"),
+        },
+        tags=["backfill", "gcs", "bigquery"],
+    )
+    def taxi_backfill():
+
+        @task
+        def ensure_bucket():
+            """Ensure the GCS bucket exists."""
+            from taxi_helpers.modules import check_bucket
+            if not check_bucket(BUCKET_NAME):
+                raise Exception(f"Bucket {BUCKET_NAME} is not available")
+            return True
+
+        @task(pool=MASTER_TABLE_POOL)
+        def prepare_master_tables(bucket_ready: bool, **context):
+            """Migrate or create the master tables once up front, so parallel loads never race to do it."""
+            from taxi_helpers.modules import create_master_table, migrate_master_table
+            for taxi in context["params"]["taxi_types"]:
+                migrate_master_table(taxi)
+                create_master_table(taxi)
+            return True
+
+        @task
+        def plan_months(tables_ready: bool, **context) -> list[dict]:
+            """One job per (taxi type, month) in the requested range."""
+            params = context["params"]
+            jobs = [
+                {"taxi": taxi, "year": year, "month": month}
+                for year, month in _month_range(params["start_month"], params["end_month"])
+                for taxi in params["taxi_types"]
+            ]
+            print(f"Backfilling {len(jobs)} month(s) of {', '.join(params['taxi_types'])}")
+            return jobs
+
+        @task_group
+        def load_month(job: dict):
+
+            @task(pool=DOWNLOAD_POOL)
+            def download(job: dict) -> dict:
+                """Stage the month's file locally unless it is streamed or already in GCS."""
+                from taxi_helpers.modules import download_file, verify_upload
+                if STREAM_UPLOADS or verify_upload(job["taxi"], job["month"], job["year"]):
+                    print(f"Nothing to download for {job['taxi']} {job['year']}-{job['month']:02d}")
+                elif not download_file(job["taxi"], job["month"], job["year"]):
+                    raise Exception(f"Failed to download {job['taxi']} taxi data for {job['year']}-{job['month']:02d}")
+                return job
+
+            @task(pool=UPLOAD_POOL)
+            def upload(job: dict) -> dict:
+                """Convert and upload the month to GCS (downloading again if this worker lacks the file)."""
+                from taxi_helpers.modules import push_to_gcs
+                if not push_to_gcs(job["taxi"], job["month"], job["year"]):
+                    raise Exception(f"Failed to upload {job['taxi']} taxi data for {job['year']}-{job['month']:02d}")
+                return job
+
+            # Deferred while the job runs; taxi_bigquery counts deferred tasks, so it still caps BigQuery jobs
+            BigQueryLoadOperator(task_id="load", pool=BIGQUERY_POOL, load=upload(download(job)))
+
+        @task(trigger_rule=TriggerRule.ALL_DONE)
+        def sweep_intermediates(**context):
+            """Drop leftover month intermediates of the backfilled taxi types once every month is done."""
+            from taxi_helpers.modules import sweep_intermediate_tables
+            for taxi in context["params"]["taxi_types"]:
+                sweep_intermediate_tables(taxi)
+
+        # Task dependencies
+        bucket_ready = ensure_bucket()
+        tables_ready = prepare_master_tables(bucket_ready)
+        load_month.expand(job=plan_months(tables_ready)) >> sweep_intermediates()
+
+    return taxi_backfill()
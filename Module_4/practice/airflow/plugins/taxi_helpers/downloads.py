@@ -0,0 +1,195 @@
+import gzip
+import json
+import os
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+# Streaming download configuration
+READ_SIZE = 1024 * 1024
+DOWNLOAD_PARTS = 4
+MIN_PART_SIZE = 16 * 1024 * 1024
+TIMEOUT = (10, 60)  # (connect, read) seconds
+MAX_RETRIES = 3
+
+
+def _probe(url: str) -> dict:
+    """
+    HEAD the URL (following redirects) for the file's size and range support.
+
+    The redirect target is not kept: TLC redirects to short-lived signed
+    URLs, so every request starts from the original URL and follows the
+    redirect again.
+    """
+    response = requests.head(url, allow_redirects=True, timeout=TIMEOUT)
+    response.raise_for_status()
+    size = response.headers.get("Content-Length")
+    return {
+        "url": url,
+        "size": int(size) if size is not None else None,
+        "etag": response.headers.get("ETag"),
+        "ranges": response.headers.get("Accept-Ranges", "").lower() == "bytes",
+    }
+
+
+def _load_state(state_path: str, remote: dict) -> dict | None:
+    """Return the saved part progress if it belongs to the same remote file."""
+    try:
+        with open(state_path) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if (state.get("url") != remote["url"] or state.get("size") != remote["size"]
+            or state.get("etag") != remote["etag"]):
+        return None
+    return state
+
+
+def _save_state(state_path: str, state: dict) -> None:
+    tmp_path = f"{state_path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, state_path)
+
+
+def _split_parts(size: int, parts: int) -> list[dict]:
+    """Split [0, size) into contiguous byte ranges, tracking bytes done per range."""
+    step = -(-size // parts)
+    return [{"start": start, "end": min(start + step, size) - 1, "done": 0} for start in range(0, size, step)]
+
+
+def _fetch_range(url: str, part_path: str, part: dict, on_progress) -> None:
+    """Stream one byte range into its offset of the part file, resuming from part['done']."""
+    for attempt in range(1, MAX_RETRIES + 1):
+        offset = part["start"] + part["done"]
+        if offset > part["end"]:
+            return
+        try:
+            headers = {"Range": f"bytes={offset}-{part['end']}"}
+            with requests.get(url, headers=headers, stream=True, timeout=TIMEOUT) as response:
+                response.raise_for_status()
+                if response.status_code != 206:
+                    raise requests.exceptions.HTTPError(f"Server ignored Range request ({response.status_code})")
+                with open(part_path, "r+b") as f:
+                    f.seek(offset)
+                    for block in response.iter_content(READ_SIZE):
+                        f.write(block)
+                        # Only count bytes that reached the OS, so a checkpoint never overstates progress
+                        f.flush()
+                        part["done"] += len(block)
+                        on_progress()
+            return
+        except (requests.exceptions.RequestException, OSError) as e:
+            if attempt == MAX_RETRIES:
+                raise
+            print(f"Range {offset}-{part['end']} failed ({e}), retrying ({attempt}/{MAX_RETRIES})...")
+
+
+def _download_ranges(remote: dict, part_path: str, state_path: str, parts: int) -> None:
+    """Fetch the file as parallel Range requests, persisting progress so a rerun resumes."""
+    state = _load_state(state_path, remote)
+    if state is None or not os.path.exists(part_path):
+        state = {"url": remote["url"], "size": remote["size"], "etag": remote["etag"],
+                 "parts": _split_parts(remote["size"], parts)}
+        with open(part_path, "wb") as f:
+            f.truncate(remote["size"])
+    else:
+        done = sum(p["done"] for p in state["parts"])
+        print(f"Resuming download at {done:,} of {remote['size']:,} bytes")
+
+    lock = threading.Lock()
+    written = [0]
+
+    def on_progress():
+        # Checkpoint roughly every 64 MB across all parts
+        with lock:
+            written[0] += 1
+            if written[0] % 64 == 0:
+                _save_state(state_path, state)
+
+    try:
+        with ThreadPoolExecutor(max_workers=len(state["parts"])) as pool:
+            futures = [pool.submit(_fetch_range, remote["url"], part_path, part, on_progress) for part in state["parts"]]
+            for future in futures:
+                future.result()
+    finally:
+        with lock:
+            _save_state(state_path, state)
+
+
+def _download_stream(remote: dict, part_path: str) -> None:
+    """Fetch the file as a single stream, appending to a partial file when the server allows it."""
+    offset = os.path.getsize(part_path) if remote["ranges"] and os.path.exists(part_path) else 0
+    if remote["size"] is not None and offset >= remote["size"]:
+        offset = 0
+    headers = {"Range": f"bytes={offset}-"} if offset else {}
+    with requests.get(remote["url"], headers=headers, stream=True, timeout=TIMEOUT) as response:
+        response.raise_for_status()
+        if offset and response.status_code == 206:
+            print(f"Resuming download at {offset:,} bytes")
+            mode = "ab"
+        else:
+            mode = "wb"
+        with open(part_path, mode) as f:
+            for block in response.iter_content(READ_SIZE):
+                f.write(block)
+
+
+def verify_file(file_path: str, size: int | None = None) -> None:
+    """
+    Raise ValueError if the file does not match the expected size.
+
+    Gzip files are also read through once so the CRC32 and length stored
+    in their trailer are checked.
+    """
+    actual_size = os.path.getsize(file_path)
+    if size is not None and actual_size != size:
+        raise ValueError(f"{file_path}: expected {size:,} bytes, got {actual_size:,}")
+
+    if file_path.endswith(".gz"):
+        try:
+            with gzip.open(file_path, "rb") as f:
+                while f.read(READ_SIZE):
+                    pass
+        except (OSError, EOFError, zlib.error) as e:
+            raise ValueError(f"{file_path}: corrupt gzip ({e})") from e
+
+
+def download(url: str, file_path: str, parts: int = DOWNLOAD_PARTS) -> str:
+    """
+    Stream a URL to file_path without holding it in memory. Returns file_path.
+
+    Large files on servers that accept Range requests are fetched as
+    parallel byte ranges; otherwise as one stream. Progress is kept in
+    file_path + '.part' so an interrupted download resumes where it stopped.
+    The result is verified (see verify_file) before it is moved into place.
+    """
+    part_path = f"{file_path}.part"
+    state_path = f"{part_path}.json"
+    remote = _probe(url)
+
+    if remote["size"] is not None and os.path.exists(file_path) and os.path.getsize(file_path) == remote["size"]:
+        print(f"'{os.path.basename(file_path)}' already downloaded")
+        return file_path
+
+    if remote["ranges"] and remote["size"] and parts > 1 and remote["size"] >= 2 * MIN_PART_SIZE:
+        parts = min(parts, remote["size"] // MIN_PART_SIZE)
+        _download_ranges(remote, part_path, state_path, parts)
+    else:
+        _download_stream(remote, part_path)
+
+    try:
+        verify_file(part_path, size=remote["size"])
+    except ValueError:
+        # Corrupt data cannot be resumed from; start over next time
+        for path in (part_path, state_path):
+            if os.path.exists(path):
+                os.remove(path)
+        raise
+
+    os.replace(part_path, file_path)
+    if os.path.exists(state_path):
+        os.remove(state_path)
+    return file_path
@@ -1,28 +1,51 @@
 import os
+import re
 import requests
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from google.cloud import storage, bigquery
-from google.api_core.exceptions import Forbidden
+from google.api_core.exceptions import Forbidden, NotFound
 import time
 
-# Configuration
-BASE_URL = "https://github.com/DataTalksClub/nyc-tlc-data/releases/download"
-DOWNLOAD_DIR = "/tmp"
-CHUNK_SIZE = 8 * 1024 * 1024
-PROJECT_ID = "de-zoomcamp-485104"
-BUCKET_NAME = "de-zoomcamp-485104-bucket"
-DATASET_NAME = "demo_dataset"
-CREDENTIALS_FILE = "/opt/airflow/keys/service-account.json"
+from taxi_helpers.clients import cached_client
+from taxi_helpers.config import (
+    BASE_URL,
+    DOWNLOAD_DIR,
+    CHUNK_SIZE,
+    PROJECT_ID,
+    BUCKET_NAME,
+    DATASET_NAME,
+    CREDENTIALS_FILE,
+    BQ_LOCATION,
+    STREAM_UPLOADS,
+    INTERMEDIATE_TTL_HOURS,
+    KEEP_INTERMEDIATES,
+    SWEEP_MIN_AGE_HOURS,
+    MANIFEST_TABLE,
+)
+from taxi_helpers.downloads import download
+from taxi_helpers.schemas import (
+    load_script,
+    manifest_ddl,
+    manifest_insert,
+    master_table_ddl,
+    migration_script,
+)
+from taxi_helpers.telemetry import job_config, record_job, run_query
+from taxi_helpers.convert import convert_file
+from taxi_helpers.uploads import file_crc32c, stream_parquet_to_gcs
+
+# Names of the per-month intermediates of a load: {taxi}_tripdata_YYYY-MM and its _ext external table
+INTERMEDIATE_PATTERN = re.compile(r"^(?P<taxi>[a-z]+)_tripdata_(?P<month>\d{4}-\d{2})(?P<external>_ext)?$")
 
 
 def get_gcs_client() -> storage.Client:
-    """Get authenticated GCS client."""
-    return storage.Client.from_service_account_json(CREDENTIALS_FILE)
+    """Get authenticated GCS client (shared within the worker process)."""
+    return cached_client(storage.Client, CREDENTIALS_FILE)
 
 
 def get_bq_client() -> bigquery.Client:
-    """Get authenticated BigQuery client."""
-    return bigquery.Client.from_service_account_json(CREDENTIALS_FILE)
+    """Get authenticated BigQuery client (shared within the worker process)."""
+    return cached_client(bigquery.Client, CREDENTIALS_FILE)
 
 
 def download_file(taxi: str, month: int, year: int) -> bool:
@@ -31,15 +54,11 @@ def download_file(taxi: str, month: int, year: int) -> bool:
     url = f"{BASE_URL}/{taxi}/{file_name}"
     file_path = os.path.join(DOWNLOAD_DIR, file_name)
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-
-        with open(file_path, "wb") as f:
-            f.write(response.content)
+        download(url, file_path)
         print(f"Successfully downloaded '{file_name}'")
         return True
 
-    except requests.exceptions.RequestException as e:
+    except (requests.exceptions.RequestException, OSError, ValueError) as e:
         print(f"Error during download: {e}")
         return False
 
@@ -47,11 +66,10 @@ def download_file(taxi: str, month: int, year: int) -> bool:
 def check_bucket(bucket_name: str) -> bool:
     """Check if bucket exists, create if not."""
     client = get_gcs_client()
-    all_buckets = [b.id for b in client.list_buckets()]
-    if bucket_name in all_buckets:
-        print(f"Bucket - {bucket_name} already exists.")
-        return True
     try:
+        if client.lookup_bucket(bucket_name) is not None:
+            print(f"Bucket - {bucket_name} already exists.")
+            return True
         client.create_bucket(bucket_name)
         print(f"Created bucket '{bucket_name}'")
         return True
@@ -61,63 +79,113 @@ def check_bucket(bucket_name: str) -> bool:
 
 
 def verify_upload(taxi: str, month: int, year: int) -> bool:
-    """Check if file exists in bucket."""
+    """Check if the converted Parquet file exists in bucket."""
     client = get_gcs_client()
-    file_name = f"{taxi}_tripdata_{datetime(year, month, 1).strftime('%Y-%m')}.csv.gz"
+    parquet_name = f"{taxi}_tripdata_{datetime(year, month, 1).strftime('%Y-%m')}.parquet"
     bucket = client.bucket(BUCKET_NAME)
-    blob = bucket.blob(file_name)
+    blob = bucket.blob(parquet_name)
     return blob.exists()
 
 
-def push_to_gcs(taxi: str, month: int, year: int, max_retries: int = 3) -> bool:
-    """Upload file to GCS bucket. Returns True if successful."""
+def stream_push_to_gcs(taxi: str, month: int, year: int, max_retries: int = 3) -> bool:
+    """Stream the source file into GCS as Parquet without writing it to disk. Returns True if successful."""
     file_name = f"{taxi}_tripdata_{datetime(year, month, 1).strftime('%Y-%m')}.csv.gz"
-    file_path = os.path.join(DOWNLOAD_DIR, file_name)
+    parquet_name = f"{taxi}_tripdata_{datetime(year, month, 1).strftime('%Y-%m')}.parquet"
+    url = f"{BASE_URL}/{taxi}/{file_name}"
 
-    # 1. Check if file already exists in bucket
-    if verify_upload(taxi, month, year):
-        print(f"Blob - {file_name} already exists in bucket. Skipping.")
-        if os.path.exists(file_path):
-            os.remove(file_path)
+    if not check_bucket(BUCKET_NAME):
+        return False
+    bucket = get_gcs_client().bucket(BUCKET_NAME)
+    if bucket.get_blob(parquet_name) is not None:
+        print(f"Blob - {parquet_name} already exists in bucket. Skipping.")
         return True
 
-    # 2. Ensure local file exists (download if needed)
-    if not os.path.exists(file_path):
-        print(f"File {file_name} not found locally. Downloading...")
-        if not download_file(taxi, month, year):
-            print(f"Failed to download {file_name}. Aborting.")
-            return False
+    for attempt in range(1, max_retries + 1):
+        try:
+            print(f"Streaming {url} to gs://{BUCKET_NAME}/{parquet_name} (attempt {attempt}/{max_retries})...")
+            rows = stream_parquet_to_gcs(url, bucket.blob(parquet_name), taxi, chunk_size=CHUNK_SIZE)
+            print(f"✓ {parquet_name} uploaded successfully ({rows:,} rows).")
+            return True
+        except Exception as e:
+            print(f"Upload error for {parquet_name}: {e}")
+
+        if attempt < max_retries:
+            print("Retrying in 5 seconds...")
+            time.sleep(5)
+
+    print(f"✗ Failed to upload {parquet_name} after {max_retries} attempts.")
+    return False
+
 
-    # 3. Ensure bucket exists
+def push_to_gcs(taxi: str, month: int, year: int, max_retries: int = 3, stream: bool = STREAM_UPLOADS) -> bool:
+    """Convert the file to Parquet and upload it to GCS (streamed without a local copy if stream). Returns True if successful."""
+    if stream:
+        return stream_push_to_gcs(taxi, month, year, max_retries)
+
+    file_name = f"{taxi}_tripdata_{datetime(year, month, 1).strftime('%Y-%m')}.csv.gz"
+    parquet_name = f"{taxi}_tripdata_{datetime(year, month, 1).strftime('%Y-%m')}.parquet"
+    file_path = os.path.join(DOWNLOAD_DIR, file_name)
+    parquet_path = os.path.join(DOWNLOAD_DIR, parquet_name)
+
+    # 1. Ensure bucket exists
     if not check_bucket(BUCKET_NAME):
         return False
 
-    # 4. Upload with retries
+    # 2. One metadata lookup; without a local copy an existing blob is trusted
     client = get_gcs_client()
     bucket = client.bucket(BUCKET_NAME)
-    blob = bucket.blob(file_name)
+    existing = bucket.get_blob(parquet_name)
+    if existing is not None and not os.path.exists(parquet_path):
+        print(f"Blob - {parquet_name} already exists in bucket. Skipping.")
+        return True
+
+    # 3. Ensure local Parquet file exists (download and convert if needed)
+    if not os.path.exists(parquet_path):
+        if not os.path.exists(file_path):
+            print(f"File {file_name} not found locally. Downloading...")
+            if not download_file(taxi, month, year):
+                print(f"Failed to download {file_name}. Aborting.")
+                return False
+        try:
+            convert_file(file_path, taxi)
+        except Exception as e:
+            print(f"Failed to convert {file_name} to Parquet: {e}. Aborting.")
+            return False
+        os.remove(file_path)
+
+    # 4. Skip if the bucket already holds identical bytes
+    crc32c = file_crc32c(parquet_path)
+    if existing is not None and existing.crc32c == crc32c:
+        print(f"Blob - {parquet_name} already in bucket with matching checksum. Skipping.")
+        os.remove(parquet_path)
+        return True
+    if existing is not None:
+        print(f"Blob - {parquet_name} checksum differs from local file. Re-uploading.")
+
+    # 5. Upload with retries, trusting the checksum GCS returns with the upload
+    blob = bucket.blob(parquet_name)
     blob.chunk_size = CHUNK_SIZE
 
     for attempt in range(1, max_retries + 1):
         try:
-            print(f"Uploading {file_name} (attempt {attempt}/{max_retries})...")
-            blob.upload_from_filename(file_path)
+            print(f"Uploading {parquet_name} (attempt {attempt}/{max_retries})...")
+            blob.upload_from_filename(parquet_path, checksum="crc32c")
 
-            if verify_upload(taxi, month, year):
-                print(f"✓ {file_name} uploaded successfully.")
-                os.remove(file_path)
+            if blob.crc32c == crc32c:
+                print(f"✓ {parquet_name} uploaded successfully.")
+                os.remove(parquet_path)
                 return True
             else:
-                print(f"Verification failed for {file_name}.")
+                print(f"Checksum mismatch for {parquet_name} (local {crc32c}, remote {blob.crc32c}).")
 
         except Exception as e:
-            print(f"Upload error for {file_name}: {e}")
+            print(f"Upload error for {parquet_name}: {e}")
 
         if attempt < max_retries:
             print("Retrying in 5 seconds...")
             time.sleep(5)
 
-    print(f"✗ Failed to upload {file_name} after {max_retries} attempts.")
+    print(f"✗ Failed to upload {parquet_name} after {max_retries} attempts.")
     return False
 
 
@@ -125,337 +193,148 @@ def push_to_gcs(taxi: str, month: int, year: int, max_retries: int = 3) -> bool:
 # BigQuery Table Creation
 # ─────────────────────────────────────────────────────────────────────────────
 
-def create_green_tables(year: int, month: int) -> bool:
-    """Create BQ tables for green taxi data: master → external → tmp → merge."""
+def migrate_master_table(taxi: str) -> bool:
+    """Rebuild a master table still keyed by the BYTES MD5 unique_row_id. Returns True if it was migrated."""
     bq_client = get_bq_client()
-    file_name = f"green_tripdata_{datetime(year, month, 1).strftime('%Y-%m')}.csv.gz"
-    dataset_id = f"{PROJECT_ID}.{DATASET_NAME}"
-    master_table = f"{dataset_id}.green_tripdata"
-    tmp_table = f"{dataset_id}.green_tripdata_{datetime(year, month, 1).strftime('%Y-%m')}"
-    ext_table = f"{tmp_table}_ext"
+    master_table = f"{PROJECT_ID}.{DATASET_NAME}.{taxi}_tripdata"
+    try:
+        table = bq_client.get_table(master_table)
+    except NotFound:
+        return False
+    key = next((field for field in table.schema if field.name == "unique_row_id"), None)
+    if key is None or key.field_type != "BYTES":
+        return False
 
-    # 1. Create master table (if not exists)
-    master_table_query = f"""
-        CREATE TABLE IF NOT EXISTS `{master_table}`
-        (
-            unique_row_id BYTES OPTIONS (description = 'A unique identifier for the trip, generated by hashing key trip attributes.'),
-            filename STRING OPTIONS (description = 'The source filename from which the trip data was loaded.'),
-            VendorID STRING OPTIONS (description = 'A code indicating the LPEP provider that provided the record. 1= Creative Mobile Technologies, LLC; 2= VeriFone Inc.'),
-            lpep_pickup_datetime TIMESTAMP OPTIONS (description = 'The date and time when the meter was engaged'),
-            lpep_dropoff_datetime TIMESTAMP OPTIONS (description = 'The date and time when the meter was disengaged'),
-            store_and_fwd_flag STRING OPTIONS (description = 'This flag indicates whether the trip record was held in vehicle memory before sending to the vendor'),
-            RatecodeID STRING OPTIONS (description = 'The final rate code in effect at the end of the trip. 1= Standard rate 2=JFK 3=Newark 4=Nassau or Westchester 5=Negotiated fare 6=Group ride'),
-            PULocationID STRING OPTIONS (description = 'TLC Taxi Zone in which the taximeter was engaged'),
-            DOLocationID STRING OPTIONS (description = 'TLC Taxi Zone in which the taximeter was disengaged'),
-            passenger_count INT64 OPTIONS (description = 'The number of passengers in the vehicle. This is a driver-entered value.'),
-            trip_distance NUMERIC OPTIONS (description = 'The elapsed trip distance in miles reported by the taximeter.'),
-            fare_amount NUMERIC OPTIONS (description = 'The time-and-distance fare calculated by the meter'),
-            extra NUMERIC OPTIONS (description = 'Miscellaneous extras and surcharges'),
-            mta_tax NUMERIC OPTIONS (description = '$0.50 MTA tax that is automatically triggered based on the metered rate in use'),
-            tip_amount NUMERIC OPTIONS (description = 'Tip amount. This field is automatically populated for credit card tips. Cash tips are not included.'),
-            tolls_amount NUMERIC OPTIONS (description = 'Total amount of all tolls paid in trip.'),
-            ehail_fee NUMERIC,
-            improvement_surcharge NUMERIC OPTIONS (description = '$0.30 improvement surcharge assessed on hailed trips at the flag drop.'),
-            total_amount NUMERIC OPTIONS (description = 'The total amount charged to passengers. Does not include cash tips.'),
-            payment_type INTEGER OPTIONS (description = 'A numeric code signifying how the passenger paid for the trip. 1= Credit card 2= Cash 3= No charge 4= Dispute 5= Unknown 6= Voided trip'),
-            trip_type STRING OPTIONS (description = 'A code indicating whether the trip was a street-hail or a dispatch. 1= Street-hail 2= Dispatch'),
-            congestion_surcharge NUMERIC OPTIONS (description = 'Congestion surcharge applied to trips in congested zones')
-        )
-        PARTITION BY DATE(lpep_pickup_datetime);
-    """
+    print(f"Migrating `{master_table}` to the INT64 fingerprint key with clustering...")
+    run_query(bq_client, migration_script(taxi, master_table), taxi, step="migrate")
+    print(f"✓ Migrated `{master_table}`. The MD5-keyed table is kept as `{master_table}_md5`; drop it once verified.")
+    return True
 
-    print("Step 1: Creating master table...")
-    bq_client.query(master_table_query).result()
+
+def create_master_table(taxi: str) -> bool:
+    """Create the master table for a taxi type if it does not exist yet."""
+    master_table = f"{PROJECT_ID}.{DATASET_NAME}.{taxi}_tripdata"
+    run_query(get_bq_client(), master_table_ddl(taxi, master_table), taxi, step="create_master")
     print(f"✓ Master table `{master_table}` ready.")
+    return True
 
-    # 2. Create external table for this month/year
-    ext_table_query = f"""
-        CREATE OR REPLACE EXTERNAL TABLE `{ext_table}`
-        (
-            VendorID STRING OPTIONS (description = 'A code indicating the LPEP provider that provided the record. 1= Creative Mobile Technologies, LLC; 2= VeriFone Inc.'),
-            lpep_pickup_datetime TIMESTAMP OPTIONS (description = 'The date and time when the meter was engaged'),
-            lpep_dropoff_datetime TIMESTAMP OPTIONS (description = 'The date and time when the meter was disengaged'),
-            store_and_fwd_flag STRING OPTIONS (description = 'This flag indicates whether the trip record was held in vehicle memory before sending to the vendor'),
-            RatecodeID STRING OPTIONS (description = 'The final rate code in effect at the end of the trip. 1= Standard rate 2=JFK 3=Newark 4=Nassau or Westchester 5=Negotiated fare 6=Group ride'),
-            PULocationID STRING OPTIONS (description = 'TLC Taxi Zone in which the taximeter was engaged'),
-            DOLocationID STRING OPTIONS (description = 'TLC Taxi Zone in which the taximeter was disengaged'),
-            passenger_count INT64 OPTIONS (description = 'The number of passengers in the vehicle. This is a driver-entered value.'),
-            trip_distance NUMERIC OPTIONS (description = 'The elapsed trip distance in miles reported by the taximeter.'),
-            fare_amount NUMERIC OPTIONS (description = 'The time-and-distance fare calculated by the meter'),
-            extra NUMERIC OPTIONS (description = 'Miscellaneous extras and surcharges'),
-            mta_tax NUMERIC OPTIONS (description = '$0.50 MTA tax that is automatically triggered based on the metered rate in use'),
-            tip_amount NUMERIC OPTIONS (description = 'Tip amount. This field is automatically populated for credit card tips. Cash tips are not included.'),
-            tolls_amount NUMERIC OPTIONS (description = 'Total amount of all tolls paid in trip.'),
-            ehail_fee NUMERIC,
-            improvement_surcharge NUMERIC OPTIONS (description = '$0.30 improvement surcharge assessed on hailed trips at the flag drop.'),
-            total_amount NUMERIC OPTIONS (description = 'The total amount charged to passengers. Does not include cash tips.'),
-            payment_type INTEGER OPTIONS (description = 'A numeric code signifying how the passenger paid for the trip. 1= Credit card 2= Cash 3= No charge 4= Dispute 5= Unknown 6= Voided trip'),
-            trip_type STRING OPTIONS (description = 'A code indicating whether the trip was a street-hail or a dispatch. 1= Street-hail 2= Dispatch'),
-            congestion_surcharge NUMERIC OPTIONS (description = 'Congestion surcharge applied to trips in congested zones')
-        )
-        OPTIONS (
-            format = 'CSV',
-            uris = ['gs://{BUCKET_NAME}/{file_name}'],
-            skip_leading_rows = 1,
-            ignore_unknown_values = TRUE
-        );
-    """
 
-    print("Step 2: Creating external table...")
-    bq_client.query(ext_table_query).result()
-    print(f"✓ External table `{ext_table}` ready.")
-
-    # 3. Create tmp table with unique_row_id and filename
-    tmp_table_query = f"""
-        CREATE OR REPLACE TABLE `{tmp_table}`
-        AS
-        SELECT
-            MD5(CONCAT(
-                COALESCE(CAST(VendorID AS STRING), ''),
-                COALESCE(CAST(lpep_pickup_datetime AS STRING), ''),
-                COALESCE(CAST(lpep_dropoff_datetime AS STRING), ''),
-                COALESCE(CAST(PULocationID AS STRING), ''),
-                COALESCE(CAST(DOLocationID AS STRING), '')
-            )) AS unique_row_id,
-            '{file_name}' AS filename,
-            *
-        FROM `{ext_table}`;
+def submit_load_job(taxi: str, year: int, month: int) -> str:
     """
+    Start the BQ load script for one month of taxi data without waiting for it. Returns the job ID.
 
-    print("Step 3: Creating tmp table...")
-    bq_client.query(tmp_table_query).result()
-    print(f"✓ Tmp table `{tmp_table}` ready.")
-
-    # 4. Merge tmp into master
-    merge_query = f"""
-        MERGE INTO `{master_table}` T
-        USING `{tmp_table}` S
-        ON T.unique_row_id = S.unique_row_id
-        WHEN NOT MATCHED THEN
-            INSERT (unique_row_id, filename, VendorID, lpep_pickup_datetime, lpep_dropoff_datetime, store_and_fwd_flag, RatecodeID, PULocationID, DOLocationID, passenger_count, trip_distance, fare_amount, extra, mta_tax, tip_amount, tolls_amount, ehail_fee, improvement_surcharge, total_amount, payment_type, trip_type, congestion_surcharge)
-            VALUES (S.unique_row_id, S.filename, S.VendorID, S.lpep_pickup_datetime, S.lpep_dropoff_datetime, S.store_and_fwd_flag, S.RatecodeID, S.PULocationID, S.DOLocationID, S.passenger_count, S.trip_distance, S.fare_amount, S.extra, S.mta_tax, S.tip_amount, S.tolls_amount, S.ehail_fee, S.improvement_surcharge, S.total_amount, S.payment_type, S.trip_type, S.congestion_surcharge);
+    The master table must already have the current key; migrate_master_table()
+    runs once up front (prepare_master_table tasks), never per load.
     """
-
-    print("Step 4: Merging into master table...")
-    bq_client.query(merge_query).result()
-    print(f"✓ Merged `{tmp_table}` into `{master_table}`.")
-
-    return True
-
-
-def create_yellow_tables(year: int, month: int) -> bool:
-    """Create BQ tables for yellow taxi data: master → external → tmp → merge."""
     bq_client = get_bq_client()
-    file_name = f"yellow_tripdata_{datetime(year, month, 1).strftime('%Y-%m')}.csv.gz"
+    month_str = datetime(year, month, 1).strftime('%Y-%m')
+    # The filename lineage column keeps the TLC source name, as before the Parquet conversion,
+    # so rows loaded before and after it stay comparable; the object loaded is parquet_name
+    file_name = f"{taxi}_tripdata_{month_str}.csv.gz"
+    parquet_name = f"{taxi}_tripdata_{month_str}.parquet"
     dataset_id = f"{PROJECT_ID}.{DATASET_NAME}"
-    master_table = f"{dataset_id}.yellow_tripdata"
-    tmp_table = f"{dataset_id}.yellow_tripdata_{datetime(year, month, 1).strftime('%Y-%m')}"
+    master_table = f"{dataset_id}.{taxi}_tripdata"
+    tmp_table = f"{dataset_id}.{taxi}_tripdata_{month_str}"
     ext_table = f"{tmp_table}_ext"
 
-    # 1. Create master table (if not exists)
-    master_table_query = f"""
-        CREATE TABLE IF NOT EXISTS `{master_table}`
-        (
-            unique_row_id BYTES OPTIONS (description = 'A unique identifier for the trip, generated by hashing key trip attributes.'),
-            filename STRING OPTIONS (description = 'The source filename from which the trip data was loaded.'),
-            VendorID STRING OPTIONS (description = 'A code indicating the TPEP provider that provided the record. 1= Creative Mobile Technologies, LLC; 2= VeriFone Inc.'),
-            tpep_pickup_datetime TIMESTAMP OPTIONS (description = 'The date and time when the meter was engaged'),
-            tpep_dropoff_datetime TIMESTAMP OPTIONS (description = 'The date and time when the meter was disengaged'),
-            passenger_count INTEGER OPTIONS (description = 'The number of passengers in the vehicle. This is a driver-entered value.'),
-            trip_distance NUMERIC OPTIONS (description = 'The elapsed trip distance in miles reported by the taximeter.'),
-            RatecodeID STRING OPTIONS (description = 'The final rate code in effect at the end of the trip. 1= Standard rate 2=JFK 3=Newark 4=Nassau or Westchester 5=Negotiated fare 6=Group ride'),
-            store_and_fwd_flag STRING OPTIONS (description = 'This flag indicates whether the trip record was held in vehicle memory before sending to the vendor. TRUE = store and forward trip, FALSE = not a store and forward trip'),
-            PULocationID STRING OPTIONS (description = 'TLC Taxi Zone in which the taximeter was engaged'),
-            DOLocationID STRING OPTIONS (description = 'TLC Taxi Zone in which the taximeter was disengaged'),
-            payment_type INTEGER OPTIONS (description = 'A numeric code signifying how the passenger paid for the trip. 1= Credit card 2= Cash 3= No charge 4= Dispute 5= Unknown 6= Voided trip'),
-            fare_amount NUMERIC OPTIONS (description = 'The time-and-distance fare calculated by the meter'),
-            extra NUMERIC OPTIONS (description = 'Miscellaneous extras and surcharges. Currently, this only includes the $0.50 and $1 rush hour and overnight charges'),
-            mta_tax NUMERIC OPTIONS (description = '$0.50 MTA tax that is automatically triggered based on the metered rate in use'),
-            tip_amount NUMERIC OPTIONS (description = 'Tip amount. This field is automatically populated for credit card tips. Cash tips are not included.'),
-            tolls_amount NUMERIC OPTIONS (description = 'Total amount of all tolls paid in trip.'),
-            improvement_surcharge NUMERIC OPTIONS (description = '$0.30 improvement surcharge assessed on hailed trips at the flag drop. The improvement surcharge began being levied in 2015.'),
-            total_amount NUMERIC OPTIONS (description = 'The total amount charged to passengers. Does not include cash tips.'),
-            congestion_surcharge NUMERIC OPTIONS (description = 'Congestion surcharge applied to trips in congested zones')
-        )
-        PARTITION BY DATE(tpep_pickup_datetime);
-    """
+    script = load_script(
+        taxi, master_table, ext_table, tmp_table, f"gs://{BUCKET_NAME}/{parquet_name}", file_name,
+        month=month_str,
+        manifest_table=f"{dataset_id}.{MANIFEST_TABLE}",
+        ttl_hours=INTERMEDIATE_TTL_HOURS,
+        keep_intermediates=KEEP_INTERMEDIATES > 0,
+    )
 
-    print("Step 1: Creating master table...")
-    bq_client.query(master_table_query).result()
-    print(f"✓ Master table `{master_table}` ready.")
+    job = bq_client.query(script, location=BQ_LOCATION, job_config=job_config(taxi, "load", month_str))
+    print(f"Submitted load script for {taxi} {month_str} as job {job.job_id}.")
+    return job.job_id
 
-    # 2. Create external table for this month/year
-    ext_table_query = f"""
-        CREATE OR REPLACE EXTERNAL TABLE `{ext_table}`
-        (
-            VendorID STRING OPTIONS (description = 'A code indicating the TPEP provider that provided the record. 1= Creative Mobile Technologies, LLC; 2= VeriFone Inc.'),
-            tpep_pickup_datetime TIMESTAMP OPTIONS (description = 'The date and time when the meter was engaged'),
-            tpep_dropoff_datetime TIMESTAMP OPTIONS (description = 'The date and time when the meter was disengaged'),
-            passenger_count INTEGER OPTIONS (description = 'The number of passengers in the vehicle. This is a driver-entered value.'),
-            trip_distance NUMERIC OPTIONS (description = 'The elapsed trip distance in miles reported by the taximeter.'),
-            RatecodeID STRING OPTIONS (description = 'The final rate code in effect at the end of the trip. 1= Standard rate 2=JFK 3=Newark 4=Nassau or Westchester 5=Negotiated fare 6=Group ride'),
-            store_and_fwd_flag STRING OPTIONS (description = 'This flag indicates whether the trip record was held in vehicle memory before sending to the vendor. TRUE = store and forward trip, FALSE = not a store and forward trip'),
-            PULocationID STRING OPTIONS (description = 'TLC Taxi Zone in which the taximeter was engaged'),
-            DOLocationID STRING OPTIONS (description = 'TLC Taxi Zone in which the taximeter was disengaged'),
-            payment_type INTEGER OPTIONS (description = 'A numeric code signifying how the passenger paid for the trip. 1= Credit card 2= Cash 3= No charge 4= Dispute 5= Unknown 6= Voided trip'),
-            fare_amount NUMERIC OPTIONS (description = 'The time-and-distance fare calculated by the meter'),
-            extra NUMERIC OPTIONS (description = 'Miscellaneous extras and surcharges. Currently, this only includes the $0.50 and $1 rush hour and overnight charges'),
-            mta_tax NUMERIC OPTIONS (description = '$0.50 MTA tax that is automatically triggered based on the metered rate in use'),
-            tip_amount NUMERIC OPTIONS (description = 'Tip amount. This field is automatically populated for credit card tips. Cash tips are not included.'),
-            tolls_amount NUMERIC OPTIONS (description = 'Total amount of all tolls paid in trip.'),
-            improvement_surcharge NUMERIC OPTIONS (description = '$0.30 improvement surcharge assessed on hailed trips at the flag drop. The improvement surcharge began being levied in 2015.'),
-            total_amount NUMERIC OPTIONS (description = 'The total amount charged to passengers. Does not include cash tips.'),
-            congestion_surcharge NUMERIC OPTIONS (description = 'Congestion surcharge applied to trips in congested zones')
-        )
-        OPTIONS (
-            format = 'CSV',
-            uris = ['gs://{BUCKET_NAME}/{file_name}'],
-            skip_leading_rows = 1,
-            ignore_unknown_values = TRUE
-        );
-    """
 
-    print("Step 2: Creating external table...")
-    bq_client.query(ext_table_query).result()
-    print(f"✓ External table `{ext_table}` ready.")
-
-    # 3. Create tmp table with unique_row_id and filename
-    tmp_table_query = f"""
-        CREATE OR REPLACE TABLE `{tmp_table}`
-        AS
-        SELECT
-            MD5(CONCAT(
-                COALESCE(CAST(VendorID AS STRING), ''),
-                COALESCE(CAST(tpep_pickup_datetime AS STRING), ''),
-                COALESCE(CAST(tpep_dropoff_datetime AS STRING), ''),
-                COALESCE(CAST(PULocationID AS STRING), ''),
-                COALESCE(CAST(DOLocationID AS STRING), '')
-            )) AS unique_row_id,
-            '{file_name}' AS filename,
-            *
-        FROM `{ext_table}`;
+def sweep_intermediate_tables(taxi: str | None = None, keep_last: int = KEEP_INTERMEDIATES) -> list[str]:
     """
+    Drop leftover month intermediates (tmp and _ext tables), keeping those of the last keep_last loaded months.
 
-    print("Step 3: Creating tmp table...")
-    bq_client.query(tmp_table_query).result()
-    print(f"✓ Tmp table `{tmp_table}` ready.")
-
-    # 4. Merge tmp into master
-    merge_query = f"""
-        MERGE INTO `{master_table}` T
-        USING `{tmp_table}` S
-        ON T.unique_row_id = S.unique_row_id
-        WHEN NOT MATCHED THEN
-            INSERT (unique_row_id, filename, VendorID, tpep_pickup_datetime, tpep_dropoff_datetime, passenger_count, trip_distance, RatecodeID, store_and_fwd_flag, PULocationID, DOLocationID, payment_type, fare_amount, extra, mta_tax, tip_amount, tolls_amount, improvement_surcharge, total_amount, congestion_surcharge)
-            VALUES (S.unique_row_id, S.filename, S.VendorID, S.tpep_pickup_datetime, S.tpep_dropoff_datetime, S.passenger_count, S.trip_distance, S.RatecodeID, S.store_and_fwd_flag, S.PULocationID, S.DOLocationID, S.payment_type, S.fare_amount, S.extra, S.mta_tax, S.tip_amount, S.tolls_amount, S.improvement_surcharge, S.total_amount, S.congestion_surcharge);
+    Works from the dataset listing, so tables left by failed loads or by
+    older versions of the load are collected too; tables younger than
+    SWEEP_MIN_AGE_HOURS are skipped. Drops are logged in the manifest.
+    Returns the dropped table IDs.
     """
-
-    print("Step 4: Merging into master table...")
-    bq_client.query(merge_query).result()
-    print(f"✓ Merged `{tmp_table}` into `{master_table}`.")
-
-    return True
-
-
-def create_fhv_tables(year: int, month: int) -> bool:
-    """Create BQ tables for FHV data: master -> external -> tmp -> merge."""
     bq_client = get_bq_client()
-    file_name = f"fhv_tripdata_{datetime(year, month, 1).strftime('%Y-%m')}.csv.gz"
     dataset_id = f"{PROJECT_ID}.{DATASET_NAME}"
-    master_table = f"{dataset_id}.fhv_tripdata"
-    tmp_table = f"{dataset_id}.fhv_tripdata_{datetime(year, month, 1).strftime('%Y-%m')}"
-    ext_table = f"{tmp_table}_ext"
-
-    # 1. Create master table (if not exists)
-    master_table_query = f"""
-        CREATE TABLE IF NOT EXISTS `{master_table}`
-        (
-            unique_row_id BYTES OPTIONS (description = 'A unique identifier for the trip, generated by hashing key trip attributes.'),
-            filename STRING OPTIONS (description = 'The source filename from which the trip data was loaded.'),
-            dispatching_base_num STRING OPTIONS (description = 'The TLC Base License Number of the base that dispatched the trip'),
-            pickup_datetime TIMESTAMP OPTIONS (description = 'The date and time of the trip pickup'),
-            dropOff_datetime TIMESTAMP OPTIONS (description = 'The date and time of the trip dropoff'),
-            PUlocationID STRING OPTIONS (description = 'TLC Taxi Zone in which the trip began'),
-            DOlocationID STRING OPTIONS (description = 'TLC Taxi Zone in which the trip ended'),
-            SR_Flag STRING OPTIONS (description = 'Indicates if the trip was a part of a shared ride chain offered by a High Volume FHV company (e.g. Uber Pool, Lyft Line). For shared trips, the value is 1. For non-shared trips, this field is null. NOTE: This field is not collected by the TLC, but is derived from the High Volume FHV Trip Record submitted by the High Volume FHV company.'),
-            Affiliated_base_number STRING OPTIONS (description = 'The TLC Base License Number of the base that is affiliated with the vehicle that performed the trip')
-        )
-        PARTITION BY DATE(pickup_datetime);
-    """
-
-    print("Step 1: Creating master table...")
-    bq_client.query(master_table_query).result()
-    print(f"✓ Master table `{master_table}` ready.")
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=SWEEP_MIN_AGE_HOURS)
+
+    # (taxi, month) -> the intermediates of that month's load
+    loads = {}
+    for item in bq_client.list_tables(dataset_id):
+        match = INTERMEDIATE_PATTERN.match(item.table_id)
+        if match is None or (taxi is not None and match["taxi"] != taxi):
+            continue
+        loads.setdefault((match["taxi"], match["month"]), []).append((item, match))
+
+    by_taxi = {}
+    for (load_taxi, month), tables in loads.items():
+        by_taxi.setdefault(load_taxi, []).append((max(item.created for item, _ in tables), month, tables))
+
+    dropped = []
+    for load_taxi, months in by_taxi.items():
+        # Newest loads first; the first keep_last months are kept
+        months.sort(key=lambda entry: entry[0], reverse=True)
+        for _, month, tables in months[keep_last:]:
+            for item, match in tables:
+                if item.created > cutoff:
+                    continue
+                table_id = f"{dataset_id}.{item.table_id}"
+                bq_client.delete_table(table_id, not_found_ok=True)
+                dropped.append((table_id, "external" if match["external"] else "tmp", load_taxi, month))
+
+    if dropped:
+        manifest_table = f"{dataset_id}.{MANIFEST_TABLE}"
+        sql = f"{manifest_ddl(manifest_table)}\n\n{manifest_insert(manifest_table, dropped, 'dropped')}"
+        run_query(bq_client, sql, taxi or "all", step="sweep")
+    print(f"✓ Swept {len(dropped)} intermediate table(s) from `{dataset_id}` (kept the last {keep_last} month(s)).")
+    return [table_id for table_id, *_ in dropped]
+
+
+def get_job_state(job_id: str) -> tuple[str, str | None]:
+    """Current (state, error message) of a BQ job; state is PENDING, RUNNING or DONE."""
+    job = get_bq_client().get_job(job_id, location=BQ_LOCATION)
+    error = job.error_result.get("message") if job.error_result else None
+    return job.state, error
+
+
+def report_load_job(job_id: str) -> int | None:
+    """Record the finished load script's telemetry; print and return the rows it merged (None if unknown)."""
+    bq_client = get_bq_client()
+    rows = record_job(bq_client, bq_client.get_job(job_id, location=BQ_LOCATION))
+    # The script's statements run as child jobs; the MERGE one reports the inserted rows and its cost
+    merged = next((row for row in rows if row["statement_type"] == "MERGE"), None)
+    if merged is None:
+        print(f"✓ Load job {job_id} finished.")
+        return None
+    billed_mb = (merged["bytes_billed"] or 0) / 1024 ** 2
+    print(f"✓ Load job {job_id} merged {merged['rows_affected']} new row(s) "
+          f"(MERGE billed {billed_mb:,.1f} MB, {merged['elapsed_s']}s).")
+    return merged["rows_affected"]
+
+
+def create_tables(taxi: str, year: int, month: int) -> bool:
+    """Create BQ tables for one month of taxi data in a single script job: master → external → tmp → merge → cleanup."""
+    job_id = submit_load_job(taxi, year, month)
+    get_bq_client().get_job(job_id, location=BQ_LOCATION).result()
+    report_load_job(job_id)
+    return True
 
-    # 2. Create external table for this month/year
-    ext_table_query = f"""
-        CREATE OR REPLACE EXTERNAL TABLE `{ext_table}`
-        (
-            dispatching_base_num STRING,
-            pickup_datetime TIMESTAMP,
-            dropOff_datetime TIMESTAMP,
-            PUlocationID STRING,
-            DOlocationID STRING,
-            SR_Flag STRING,
-            Affiliated_base_number STRING
-        )
-        OPTIONS (
-            format = 'CSV',
-            uris = ['gs://{BUCKET_NAME}/{file_name}'],
-            skip_leading_rows = 1,
-            ignore_unknown_values = TRUE
-        );
-    """
 
-    print("Step 2: Creating external table...")
-    bq_client.query(ext_table_query).result()
-    print(f"✓ External table `{ext_table}` ready.")
-
-    # 3. Create tmp table with unique_row_id and filename
-    tmp_table_query = f"""
-        CREATE OR REPLACE TABLE `{tmp_table}`
-        AS
-        SELECT
-            MD5(CONCAT(
-                COALESCE(CAST(dispatching_base_num AS STRING), ''),
-                COALESCE(CAST(pickup_datetime AS STRING), ''),
-                COALESCE(CAST(dropOff_datetime AS STRING), ''),
-                COALESCE(CAST(PUlocationID AS STRING), ''),
-                COALESCE(CAST(DOlocationID AS STRING), '')
-            )) AS unique_row_id,
-            '{file_name}' AS filename,
-            dispatching_base_num,
-            pickup_datetime,
-            dropOff_datetime,
-            PUlocationID,
-            DOlocationID,
-            SR_Flag,
-            Affiliated_base_number
-        FROM `{ext_table}`;
-    """
+def create_green_tables(year: int, month: int) -> bool:
+    """Create BQ tables for green taxi data."""
+    return create_tables("green", year, month)
 
-    print("Step 3: Creating tmp table...")
-    bq_client.query(tmp_table_query).result()
-    print(f"✓ Tmp table `{tmp_table}` ready.")
-
-    # 4. Merge tmp into master
-    merge_query = f"""
-        MERGE INTO `{master_table}` T
-        USING `{tmp_table}` S
-        ON T.unique_row_id = S.unique_row_id
-        WHEN NOT MATCHED THEN
-            INSERT (unique_row_id, filename, dispatching_base_num, pickup_datetime, dropOff_datetime, PUlocationID, DOlocationID, SR_Flag, Affiliated_base_number)
-            VALUES (S.unique_row_id, S.filename, S.dispatching_base_num, S.pickup_datetime, S.dropOff_datetime, S.PUlocationID, S.DOlocationID, S.SR_Flag, S.Affiliated_base_number);
-    """
 
-    print("Step 4: Merging into master table...")
-    bq_client.query(merge_query).result()
-    print(f"✓ Merged `{tmp_table}` into `{master_table}`.")
+def create_yellow_tables(year: int, month: int) -> bool:
+    """Create BQ tables for yellow taxi data."""
+    return create_tables("yellow", year, month)
 
-    # 5. Cleanup tables
-    print("Step 5: Cleaning up...")
-    bq_client.delete_table(ext_table, not_found_ok=True)
-    bq_client.delete_table(tmp_table, not_found_ok=True)
-    print(f"✓ Deleted intermediate tables `{ext_table}` and `{tmp_table}`.")
 
-    return True
+def create_fhv_tables(year: int, month: int) -> bool:
+    """Create BQ tables for FHV data."""
+    return create_tables("fhv", year, month)
@@ -0,0 +1,56 @@
+from typing import Any
+
+from airflow.exceptions import AirflowException
+
+try:
+    from airflow.sdk import BaseOperator
+except ImportError:  # Airflow 2, as in the docker-compose image
+    from airflow.models.baseoperator import BaseOperator
+
+from taxi_helpers.config import BQ_LOCATION
+from taxi_helpers.triggers import BigQueryJobTrigger, POLL_INTERVAL
+
+
+class BigQueryLoadOperator(BaseOperator):
+    """
+    Merge one month of taxi data into its master table with the BQ load script.
+
+    load is a dict with taxi, year and month (templated, so year/month may
+    be Jinja strings or an upstream task's output). With deferrable=True the
+    task submits the job, frees its worker slot and waits in the triggerer;
+    otherwise it blocks on the job like create_tables(). Returns the job ID.
+    """
+
+    template_fields = ("load",)
+    ui_color = "#e4f0e8"
+
+    def __init__(self, *, load: dict, deferrable: bool = True, poll_interval: float = POLL_INTERVAL, **kwargs):
+        super().__init__(**kwargs)
+        self.load = load
+        self.deferrable = deferrable
+        self.poll_interval = poll_interval
+
+    def execute(self, context) -> str:
+        from taxi_helpers.modules import get_bq_client, submit_load_job, report_load_job
+
+        taxi, year, month = self.load["taxi"], int(self.load["year"]), int(self.load["month"])
+        print(f"Creating BQ tables for {taxi} taxi {year}-{month:02d}")
+        job_id = submit_load_job(taxi, year, month)
+
+        if not self.deferrable:
+            get_bq_client().get_job(job_id, location=BQ_LOCATION).result()
+            report_load_job(job_id)
+            return job_id
+
+        self.defer(
+            trigger=BigQueryJobTrigger(job_id=job_id, poll_interval=self.poll_interval),
+            method_name="execute_complete",
+        )
+
+    def execute_complete(self, context, event: dict[str, Any]) -> str:
+        from taxi_helpers.modules import report_load_job
+
+        if event["status"] != "success":
+            raise AirflowException(f"BigQuery job {event['job_id']} failed: {event['message']}")
+        report_load_job(event["job_id"])
+        return event["job_id"]
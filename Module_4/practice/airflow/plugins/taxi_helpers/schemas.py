@@ -0,0 +1,250 @@
+# Declarative schemas for the taxi master tables. Everything that differs
+# between taxi types lives here; the SQL below is generated from it, so a new
+# taxi type only needs a new entry.
+#
+# columns: (name, BigQuery type, description or None) in source-file order.
+# key_columns: hashed into unique_row_id to deduplicate trips across loads;
+#   must include the partition column so the MERGE can be partition-pruned.
+# partition_column: the master table is partitioned by DATE() of this column.
+# cluster_columns: the master table is clustered on unique_row_id plus these.
+TAXI_SCHEMAS = {
+    "green": {
+        "partition_column": "lpep_pickup_datetime",
+        "key_columns": ["VendorID", "lpep_pickup_datetime", "lpep_dropoff_datetime", "PULocationID", "DOLocationID"],
+        "cluster_columns": ["PULocationID"],
+        "columns": [
+            ("VendorID", "STRING", "A code indicating the LPEP provider that provided the record. 1= Creative Mobile Technologies, LLC; 2= VeriFone Inc."),
+            ("lpep_pickup_datetime", "TIMESTAMP", "The date and time when the meter was engaged"),
+            ("lpep_dropoff_datetime", "TIMESTAMP", "The date and time when the meter was disengaged"),
+            ("store_and_fwd_flag", "STRING", "This flag indicates whether the trip record was held in vehicle memory before sending to the vendor"),
+            ("RatecodeID", "STRING", "The final rate code in effect at the end of the trip. 1= Standard rate 2=JFK 3=Newark 4=Nassau or Westchester 5=Negotiated fare 6=Group ride"),
+            ("PULocationID", "STRING", "TLC Taxi Zone in which the taximeter was engaged"),
+            ("DOLocationID", "STRING", "TLC Taxi Zone in which the taximeter was disengaged"),
+            ("passenger_count", "INT64", "The number of passengers in the vehicle. This is a driver-entered value."),
+            ("trip_distance", "NUMERIC", "The elapsed trip distance in miles reported by the taximeter."),
+            ("fare_amount", "NUMERIC", "The time-and-distance fare calculated by the meter"),
+            ("extra", "NUMERIC", "Miscellaneous extras and surcharges"),
+            ("mta_tax", "NUMERIC", "$0.50 MTA tax that is automatically triggered based on the metered rate in use"),
+            ("tip_amount", "NUMERIC", "Tip amount. This field is automatically populated for credit card tips. Cash tips are not included."),
+            ("tolls_amount", "NUMERIC", "Total amount of all tolls paid in trip."),
+            ("ehail_fee", "NUMERIC", None),
+            ("improvement_surcharge", "NUMERIC", "$0.30 improvement surcharge assessed on hailed trips at the flag drop."),
+            ("total_amount", "NUMERIC", "The total amount charged to passengers. Does not include cash tips."),
+            ("payment_type", "INTEGER", "A numeric code signifying how the passenger paid for the trip. 1= Credit card 2= Cash 3= No charge 4= Dispute 5= Unknown 6= Voided trip"),
+            ("trip_type", "STRING", "A code indicating whether the trip was a street-hail or a dispatch. 1= Street-hail 2= Dispatch"),
+            ("congestion_surcharge", "NUMERIC", "Congestion surcharge applied to trips in congested zones"),
+        ],
+    },
+    "yellow": {
+        "partition_column": "tpep_pickup_datetime",
+        "key_columns": ["VendorID", "tpep_pickup_datetime", "tpep_dropoff_datetime", "PULocationID", "DOLocationID"],
+        "cluster_columns": ["PULocationID"],
+        "columns": [
+            ("VendorID", "STRING", "A code indicating the TPEP provider that provided the record. 1= Creative Mobile Technologies, LLC; 2= VeriFone Inc."),
+            ("tpep_pickup_datetime", "TIMESTAMP", "The date and time when the meter was engaged"),
+            ("tpep_dropoff_datetime", "TIMESTAMP", "The date and time when the meter was disengaged"),
+            ("passenger_count", "INTEGER", "The number of passengers in the vehicle. This is a driver-entered value."),
+            ("trip_distance", "NUMERIC", "The elapsed trip distance in miles reported by the taximeter."),
+            ("RatecodeID", "STRING", "The final rate code in effect at the end of the trip. 1= Standard rate 2=JFK 3=Newark 4=Nassau or Westchester 5=Negotiated fare 6=Group ride"),
+            ("store_and_fwd_flag", "STRING", "This flag indicates whether the trip record was held in vehicle memory before sending to the vendor. TRUE = store and forward trip, FALSE = not a store and forward trip"),
+            ("PULocationID", "STRING", "TLC Taxi Zone in which the taximeter was engaged"),
+            ("DOLocationID", "STRING", "TLC Taxi Zone in which the taximeter was disengaged"),
+            ("payment_type", "INTEGER", "A numeric code signifying how the passenger paid for the trip. 1= Credit card 2= Cash 3= No charge 4= Dispute 5= Unknown 6= Voided trip"),
+            ("fare_amount", "NUMERIC", "The time-and-distance fare calculated by the meter"),
+            ("extra", "NUMERIC", "Miscellaneous extras and surcharges. Currently, this only includes the $0.50 and $1 rush hour and overnight charges"),
+            ("mta_tax", "NUMERIC", "$0.50 MTA tax that is automatically triggered based on the metered rate in use"),
+            ("tip_amount", "NUMERIC", "Tip amount. This field is automatically populated for credit card tips. Cash tips are not included."),
+            ("tolls_amount", "NUMERIC", "Total amount of all tolls paid in trip."),
+            ("improvement_surcharge", "NUMERIC", "$0.30 improvement surcharge assessed on hailed trips at the flag drop. The improvement surcharge began being levied in 2015."),
+            ("total_amount", "NUMERIC", "The total amount charged to passengers. Does not include cash tips."),
+            ("congestion_surcharge", "NUMERIC", "Congestion surcharge applied to trips in congested zones"),
+        ],
+    },
+    "fhv": {
+        "partition_column": "pickup_datetime",
+        "key_columns": ["dispatching_base_num", "pickup_datetime", "dropOff_datetime", "PUlocationID", "DOlocationID"],
+        "cluster_columns": ["PUlocationID"],
+        "columns": [
+            ("dispatching_base_num", "STRING", "The TLC Base License Number of the base that dispatched the trip"),
+            ("pickup_datetime", "TIMESTAMP", "The date and time of the trip pickup"),
+            ("dropOff_datetime", "TIMESTAMP", "The date and time of the trip dropoff"),
+            ("PUlocationID", "STRING", "TLC Taxi Zone in which the trip began"),
+            ("DOlocationID", "STRING", "TLC Taxi Zone in which the trip ended"),
+            ("SR_Flag", "STRING", "Indicates if the trip was a part of a shared ride chain offered by a High Volume FHV company (e.g. Uber Pool, Lyft Line). For shared trips, the value is 1. For non-shared trips, this field is null. NOTE: This field is not collected by the TLC, but is derived from the High Volume FHV Trip Record submitted by the High Volume FHV company."),
+            ("Affiliated_base_number", "STRING", "The TLC Base License Number of the base that is affiliated with the vehicle that performed the trip"),
+        ],
+    },
+}
+
+# Lineage columns prepended to every master table
+LINEAGE_COLUMNS = [
+    ("unique_row_id", "INT64", "A unique identifier for the trip, generated by fingerprinting key trip attributes."),
+    ("filename", "STRING", "The source TLC filename (.csv.gz) from which the trip data was loaded."),
+]
+
+
+def get_schema(taxi: str) -> dict:
+    """Registry entry for a taxi type; raises ValueError for an unknown one."""
+    try:
+        return TAXI_SCHEMAS[taxi]
+    except KeyError:
+        raise ValueError(f"Unknown taxi type '{taxi}'. Expected one of: {', '.join(TAXI_SCHEMAS)}") from None
+
+
+def column_names(taxi: str) -> list[str]:
+    """Source columns of a taxi type, in file order."""
+    return [name for name, _, _ in get_schema(taxi)["columns"]]
+
+
+def _sql_string(value: str) -> str:
+    return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
+def _column_ddl(name: str, bq_type: str, description: str | None) -> str:
+    if description is None:
+        return f"{name} {bq_type}"
+    return f"{name} {bq_type} OPTIONS (description = {_sql_string(description)})"
+
+
+def master_table_ddl(taxi: str, master_table: str) -> str:
+    """CREATE TABLE IF NOT EXISTS statement for a taxi type's master table."""
+    schema = get_schema(taxi)
+    columns = ",\n    ".join(_column_ddl(*column) for column in LINEAGE_COLUMNS + schema["columns"])
+    return (
+        f"CREATE TABLE IF NOT EXISTS `{master_table}`\n"
+        f"(\n    {columns}\n)\n"
+        f"PARTITION BY DATE({schema['partition_column']})\n"
+        f"CLUSTER BY {', '.join(['unique_row_id'] + schema['cluster_columns'])};"
+    )
+
+
+def _row_id_expression(taxi: str) -> str:
+    # An 8-byte INT64 joins and clusters far more cheaply than the old 16-byte MD5.
+    # The key columns are JSON-encoded as one struct, so values cannot run into
+    # each other (PU 1/DO 23 vs PU 12/DO 3) and NULL stays distinct from ''; the
+    # remaining risk is a 64-bit collision within the staged month's partitions.
+    parts = ", ".join(get_schema(taxi)["key_columns"])
+    return f"FARM_FINGERPRINT(TO_JSON_STRING(STRUCT({parts})))"
+
+
+def manifest_ddl(manifest_table: str) -> str:
+    """CREATE TABLE IF NOT EXISTS statement for the append-only log of intermediate tables."""
+    return f"""CREATE TABLE IF NOT EXISTS `{manifest_table}`
+(
+    table_id STRING OPTIONS (description = 'Fully qualified name of the intermediate table'),
+    kind STRING OPTIONS (description = 'external or tmp'),
+    taxi STRING OPTIONS (description = 'Taxi type the table was staged for'),
+    month STRING OPTIONS (description = 'Data month (YYYY-MM) the table holds'),
+    event STRING OPTIONS (description = 'created or dropped'),
+    event_at TIMESTAMP OPTIONS (description = 'When the event happened')
+);"""
+
+
+def manifest_insert(manifest_table: str, entries: list[tuple[str, str, str, str]], event: str) -> str:
+    """INSERT logging an event for (table_id, kind, taxi, month) entries in the manifest table."""
+    values = ",\n    ".join(
+        f"({', '.join(_sql_string(value) for value in entry)}, {_sql_string(event)}, CURRENT_TIMESTAMP())"
+        for entry in entries
+    )
+    return f"INSERT INTO `{manifest_table}` (table_id, kind, taxi, month, event, event_at)\nVALUES\n    {values};"
+
+
+def load_script(taxi: str, master_table: str, ext_table: str, tmp_table: str, uri: str, file_name: str,
+                month: str, manifest_table: str, ttl_hours: int, keep_intermediates: bool = False) -> str:
+    """
+    Multi-statement script loading one month's Parquet file into the master table.
+
+    master → external → tmp (with unique_row_id and filename) → merge → cleanup,
+    run by BigQuery as a single job. file_name is recorded as the lineage
+    filename of every inserted row.
+
+    The external and tmp tables expire after ttl_hours even if the script
+    fails half-way, and their creation and cleanup are logged to the
+    manifest table. With keep_intermediates they are left for debugging,
+    and the sweeper drops them later.
+
+    The MERGE target is limited to the partitions the staged month covers.
+    unique_row_id hashes the partition column, so a matching target row is
+    always in one of them (or in the NULL partition). The pickup-date range
+    is held in script variables, which BigQuery treats as constants when
+    pruning, so the rest of the master table is never scanned.
+    """
+    schema = get_schema(taxi)
+    partition_column = schema["partition_column"]
+    if partition_column not in schema["key_columns"]:
+        raise ValueError(f"Partition column '{partition_column}' of '{taxi}' must be one of its key columns")
+    columns = column_names(taxi)
+    all_columns = [name for name, _, _ in LINEAGE_COLUMNS] + columns
+    select_list = ",\n    ".join(columns)
+    intermediates = [(ext_table, "external", taxi, month), (tmp_table, "tmp", taxi, month)]
+    expiration = f"expiration_timestamp = TIMESTAMP_ADD(CURRENT_TIMESTAMP(), INTERVAL {int(ttl_hours)} HOUR)"
+    cleanup = "" if keep_intermediates else f"""
+DROP TABLE IF EXISTS `{tmp_table}`;
+DROP EXTERNAL TABLE IF EXISTS `{ext_table}`;
+{manifest_insert(manifest_table, intermediates, "dropped")}
+"""
+    return f"""DECLARE min_date DATE;
+DECLARE max_date DATE;
+
+{master_table_ddl(taxi, master_table)}
+
+{manifest_ddl(manifest_table)}
+
+CREATE OR REPLACE EXTERNAL TABLE `{ext_table}`
+OPTIONS (
+    format = 'PARQUET',
+    uris = [{_sql_string(uri)}],
+    {expiration}
+);
+
+CREATE OR REPLACE TABLE `{tmp_table}`
+OPTIONS ({expiration})
+AS
+SELECT
+    {_row_id_expression(taxi)} AS unique_row_id,
+    {_sql_string(file_name)} AS filename,
+    {select_list}
+FROM `{ext_table}`;
+
+{manifest_insert(manifest_table, intermediates, "created")}
+
+SET (min_date, max_date) = (
+    SELECT AS STRUCT MIN(DATE({partition_column})), MAX(DATE({partition_column})) FROM `{tmp_table}`
+);
+
+MERGE INTO `{master_table}` T
+USING `{tmp_table}` S
+ON T.unique_row_id = S.unique_row_id
+    AND (T.{partition_column} IS NULL OR DATE(T.{partition_column}) BETWEEN min_date AND max_date)
+WHEN NOT MATCHED THEN
+    INSERT ({", ".join(all_columns)})
+    VALUES ({", ".join(f"S.{name}" for name in all_columns)});
+{cleanup}"""
+
+
+def migration_script(taxi: str, master_table: str) -> str:
+    """
+    Script rebuilding a master table keyed by the original BYTES MD5 unique_row_id.
+
+    Rows are copied into a new table with the INT64 fingerprint key and
+    clustering, recomputing the key from the stored columns. The new table
+    then takes over the master table's name; the old one is kept as
+    <table>_md5 until it is dropped by hand.
+    """
+    table_name = master_table.rsplit(".", 1)[-1]
+    new_table = f"{master_table}_migrating"
+    all_columns = [name for name, _, _ in LINEAGE_COLUMNS] + column_names(taxi)
+    copied_columns = ",\n    ".join(all_columns[1:])
+    return f"""DROP TABLE IF EXISTS `{new_table}`;
+
+{master_table_ddl(taxi, new_table)}
+
+INSERT INTO `{new_table}` ({", ".join(all_columns)})
+SELECT
+    {_row_id_expression(taxi)} AS unique_row_id,
+    {copied_columns}
+FROM `{master_table}`;
+
+ALTER TABLE `{master_table}` RENAME TO `{table_name}_md5`;
+ALTER TABLE `{new_table}` RENAME TO `{table_name}`;
+"""
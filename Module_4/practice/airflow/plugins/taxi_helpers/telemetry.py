@@ -0,0 +1,92 @@
+import json
+import threading
+from datetime import datetime, timezone
+
+from google.cloud import bigquery
+
+from taxi_helpers.config import BQ_LOCATION, TELEMETRY_FILE
+
+# Label marking jobs submitted by these helpers, e.g. for INFORMATION_SCHEMA.JOBS queries
+PIPELINE_LABEL = {"pipeline": "taxi_helpers"}
+
+_write_lock = threading.Lock()
+
+
+def job_config(taxi: str, step: str, month: str | None = None) -> bigquery.QueryJobConfig:
+    """Query job config labelled with taxi type, step and month; the labels travel with the job."""
+    labels = {**PIPELINE_LABEL, "taxi": taxi, "step": step}
+    if month is not None:
+        labels["month"] = month
+    return bigquery.QueryJobConfig(labels=labels)
+
+
+def _elapsed_s(job) -> float | None:
+    if job.started is None or job.ended is None:
+        return None
+    return round((job.ended - job.started).total_seconds(), 3)
+
+
+def _job_row(job, labels: dict, parent_job_id: str | None = None) -> dict:
+    error = job.error_result.get("message") if job.error_result else None
+    return {
+        "recorded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "job_id": job.job_id,
+        "parent_job_id": parent_job_id,
+        "taxi": labels.get("taxi"),
+        "month": labels.get("month"),
+        "step": labels.get("step"),
+        "statement_type": job.statement_type,
+        "state": job.state,
+        "error": error,
+        "bytes_processed": job.total_bytes_processed,
+        "bytes_billed": job.total_bytes_billed,
+        "slot_ms": job.slot_millis,
+        "elapsed_s": _elapsed_s(job),
+        "rows_affected": job.num_dml_affected_rows,
+        "cache_hit": job.cache_hit,
+    }
+
+
+def _append(rows: list[dict], path: str) -> None:
+    # One write per batch under a lock; O_APPEND keeps lines from concurrent processes whole
+    with _write_lock, open(path, "a", encoding="utf-8") as f:
+        f.write("".join(json.dumps(row) + "\n" for row in rows))
+
+
+def record_job(bq_client: bigquery.Client, job, path: str | None = TELEMETRY_FILE) -> list[dict]:
+    """
+    Append the statistics of a finished job, and of each statement of a script, to the JSONL log.
+
+    Labels come from the job itself, so jobs submitted in one task and
+    finished in another are recorded the same way. Returns the rows (the
+    parent first); with path=None nothing is written. Telemetry failures
+    are printed, never raised ([] is returned if the job cannot be read).
+    """
+    try:
+        job.reload()
+        labels = job.labels or {}
+        rows = [_job_row(job, labels)]
+        if job.statement_type == "SCRIPT":
+            # Listed newest first; reversed to execution order
+            children = bq_client.list_jobs(parent_job=job.job_id)
+            rows += [_job_row(child, labels, parent_job_id=job.job_id) for child in reversed(list(children))]
+    except Exception as e:
+        print(f"Could not collect BigQuery telemetry for job {job.job_id}: {e}")
+        return []
+
+    if path:
+        try:
+            _append(rows, path)
+        except OSError as e:
+            print(f"Could not write BigQuery telemetry to {path}: {e}")
+    return rows
+
+
+def run_query(bq_client: bigquery.Client, sql: str, taxi: str, step: str, month: str | None = None):
+    """Run a labelled query, wait for it and record its statistics. Returns the finished job."""
+    job = bq_client.query(sql, location=BQ_LOCATION, job_config=job_config(taxi, step, month))
+    try:
+        job.result()
+    finally:
+        record_job(bq_client, job)
+    return job
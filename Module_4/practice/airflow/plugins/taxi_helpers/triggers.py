@@ -0,0 +1,56 @@
+import asyncio
+from typing import Any, AsyncIterator
+
+from airflow.triggers.base import BaseTrigger, TriggerEvent
+
+POLL_INTERVAL = 10  # seconds between job state checks
+MAX_POLL_ERRORS = 3  # consecutive failed checks before giving up on a job
+
+
+class BigQueryJobTrigger(BaseTrigger):
+    """
+    Poll a BigQuery job from the triggerer until it is DONE.
+
+    Fires one event: {"status": "success" | "error", "job_id", "message"}.
+    Each poll runs the blocking client call in a thread, so one triggerer
+    event loop can watch many jobs at once.
+    """
+
+    def __init__(self, job_id: str, poll_interval: float = POLL_INTERVAL):
+        super().__init__()
+        self.job_id = job_id
+        self.poll_interval = poll_interval
+
+    def serialize(self) -> tuple[str, dict[str, Any]]:
+        return (
+            "taxi_helpers.triggers.BigQueryJobTrigger",
+            {"job_id": self.job_id, "poll_interval": self.poll_interval},
+        )
+
+    async def run(self) -> AsyncIterator[TriggerEvent]:
+        # Imported here: the scheduler loads this module when it parses the DAGs
+        from taxi_helpers.modules import get_job_state
+
+        poll_errors = 0
+        while True:
+            try:
+                state, error = await asyncio.to_thread(get_job_state, self.job_id)
+                poll_errors = 0
+            except Exception as e:
+                poll_errors += 1
+                if poll_errors >= MAX_POLL_ERRORS:
+                    yield TriggerEvent({"status": "error", "job_id": self.job_id, "message": f"Polling failed: {e}"})
+                    return
+                self.log.warning("Checking job %s failed (%s); retrying", self.job_id, e)
+                await asyncio.sleep(self.poll_interval)
+                continue
+
+            if state == "DONE":
+                if error:
+                    yield TriggerEvent({"status": "error", "job_id": self.job_id, "message": error})
+                else:
+                    yield TriggerEvent({"status": "success", "job_id": self.job_id, "message": "Job finished"})
+                return
+
+            self.log.info("Job %s is %s; checking again in %ss", self.job_id, state, self.poll_interval)
+            await asyncio.sleep(self.poll_interval)
@@ -0,0 +1,123 @@
+import base64
+import io
+import queue
+import threading
+
+import google_crc32c
+import pyarrow as pa
+import requests
+
+from taxi_helpers.convert import csv_to_parquet
+
+READ_SIZE = 8 * 1024 * 1024
+# Stream mode: HTTP block size and how many blocks may wait for the uploader
+PIPE_BLOCK_SIZE = 1024 * 1024
+PIPE_MAX_BLOCKS = 16
+TIMEOUT = (10, 60)  # (connect, read) seconds
+
+
+def _encode_crc32c(checksum) -> str:
+    return base64.b64encode(checksum.digest()).decode("ascii")
+
+
+def file_crc32c(file_path: str) -> str:
+    """CRC32C of a local file, base64-encoded the way GCS reports blob.crc32c."""
+    checksum = google_crc32c.Checksum()
+    with open(file_path, "rb") as f:
+        while block := f.read(READ_SIZE):
+            checksum.update(block)
+    return _encode_crc32c(checksum)
+
+
+class DownloadPipe(io.RawIOBase):
+    """
+    Read-only file object over an HTTP response body, fed by a download thread.
+
+    At most max_blocks blocks wait in memory, so the download runs ahead of
+    the reader (overlapping the two) without ever buffering the whole file.
+    Only forward reads are supported; tell() is kept for the resumable
+    upload's bookkeeping.
+    """
+
+    def __init__(self, url: str, block_size: int = PIPE_BLOCK_SIZE, max_blocks: int = PIPE_MAX_BLOCKS):
+        super().__init__()
+        self._blocks = queue.Queue(maxsize=max_blocks)
+        self._buffer = bytearray()
+        self._position = 0
+        self._eof = False
+        self._error = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._fetch, args=(url, block_size), daemon=True)
+        self._thread.start()
+
+    def _put(self, item) -> bool:
+        """Block until the item is queued, giving up once the reader has closed the pipe."""
+        while not self._stop.is_set():
+            try:
+                self._blocks.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _fetch(self, url: str, block_size: int) -> None:
+        try:
+            with requests.get(url, stream=True, timeout=TIMEOUT) as response:
+                response.raise_for_status()
+                for block in response.iter_content(block_size):
+                    if not self._put(block):
+                        return
+        except Exception as e:
+            self._error = e
+        self._put(None)
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        """Return exactly size bytes (fewer only at end of stream), re-raising download errors."""
+        while not self._eof and (size < 0 or len(self._buffer) < size):
+            block = self._blocks.get()
+            if block is None:
+                self._eof = True
+                if self._error is not None:
+                    raise self._error
+            else:
+                self._buffer += block
+        n = len(self._buffer) if size < 0 else min(size, len(self._buffer))
+        data = bytes(self._buffer[:n])
+        del self._buffer[:n]
+        self._position += n
+        return data
+
+    def readinto(self, b) -> int:
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET and offset == self._position:
+            return self._position
+        raise io.UnsupportedOperation("DownloadPipe only reads forward")
+
+    def close(self) -> None:
+        self._stop.set()
+        super().close()
+
+
+def stream_parquet_to_gcs(url: str, blob, taxi: str, chunk_size: int = READ_SIZE) -> int:
+    """
+    Convert a .csv.gz URL to Parquet on the fly and write it straight into blob. Returns rows written.
+
+    Download, decompression, conversion and the resumable upload all overlap
+    and nothing touches disk. The gzip CRC of the download is checked while
+    decompressing, and the CRC32C of the upload by the client library. On
+    error the upload session is cancelled, so no partial blob is left.
+    """
+    with DownloadPipe(url) as pipe:
+        source = pa.CompressedInputStream(pa.PythonFile(pipe, mode="r"), "gzip")
+        with blob.open("wb", chunk_size=chunk_size, checksum="crc32c", ignore_flush=True) as sink:
+            return csv_to_parquet(source, sink, taxi)
@@ -0,0 +1,117 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("airflow")
+
+from airflow.exceptions import AirflowException  # noqa: E402
+
+from taxi_helpers import modules  # noqa: E402
+from taxi_helpers.operators import BigQueryLoadOperator  # noqa: E402
+from taxi_helpers.triggers import MAX_POLL_ERRORS, BigQueryJobTrigger  # noqa: E402
+
+
+class StubBigQuery:
+    """Stands in for the BQ client; each get_job call returns (or raises) the next scripted result."""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.polls = 0
+
+    def get_job(self, job_id, location=None):
+        self.polls += 1
+        result = self.results.pop(0) if len(self.results) > 1 else self.results[0]
+        if isinstance(result, Exception):
+            raise result
+        state, error = result
+        return SimpleNamespace(job_id=job_id, state=state, error_result={"message": error} if error else None)
+
+
+@pytest.fixture
+def bigquery(monkeypatch):
+    """Install a StubBigQuery scripted by the test, e.g. bigquery(("RUNNING", None), ("DONE", None))."""
+    def install(*results):
+        stub = StubBigQuery(*results)
+        monkeypatch.setattr(modules, "get_bq_client", lambda: stub)
+        return stub
+    return install
+
+
+def first_event(trigger: BigQueryJobTrigger, timeout: float = 5):
+    async def run():
+        return await asyncio.wait_for(trigger.run().__anext__(), timeout)
+    return asyncio.run(run()).payload
+
+
+def test_trigger_succeeds_once_job_is_done(bigquery):
+    stub = bigquery(("PENDING", None), ("RUNNING", None), ("DONE", None))
+
+    event = first_event(BigQueryJobTrigger("job-1", poll_interval=0))
+
+    assert event == {"status": "success", "job_id": "job-1", "message": "Job finished"}
+    assert stub.polls == 3
+
+
+def test_trigger_reports_job_error(bigquery):
+    bigquery(("RUNNING", None), ("DONE", "Query exceeded resource limits"))
+
+    event = first_event(BigQueryJobTrigger("job-2", poll_interval=0))
+
+    assert event == {"status": "error", "job_id": "job-2", "message": "Query exceeded resource limits"}
+
+
+def test_trigger_keeps_waiting_while_job_runs(bigquery):
+    stub = bigquery(("RUNNING", None))
+
+    with pytest.raises(asyncio.TimeoutError):
+        first_event(BigQueryJobTrigger("job-3", poll_interval=0.01), timeout=0.2)
+    assert stub.polls > 1
+
+
+def test_trigger_retries_failed_polls(bigquery):
+    stub = bigquery(ConnectionError("reset"), ("DONE", None))
+
+    event = first_event(BigQueryJobTrigger("job-4", poll_interval=0))
+
+    assert event["status"] == "success"
+    assert stub.polls == 2
+
+
+def test_trigger_gives_up_after_repeated_poll_errors(bigquery):
+    stub = bigquery(ConnectionError("reset"))
+
+    event = first_event(BigQueryJobTrigger("job-5", poll_interval=0))
+
+    assert event == {"status": "error", "job_id": "job-5", "message": "Polling failed: reset"}
+    assert stub.polls == MAX_POLL_ERRORS
+
+
+def test_trigger_serializes_its_arguments():
+    path, kwargs = BigQueryJobTrigger("job-6", poll_interval=2).serialize()
+
+    assert path == "taxi_helpers.triggers.BigQueryJobTrigger"
+    assert BigQueryJobTrigger(**kwargs).serialize() == (path, kwargs)
+
+
+@pytest.fixture
+def operator():
+    return BigQueryLoadOperator(task_id="load", load={"taxi": "green", "year": 2019, "month": 1})
+
+
+def test_execute_complete_raises_on_error_event(operator, monkeypatch):
+    monkeypatch.setattr(modules, "report_load_job", lambda job_id: pytest.fail("reported a failed job"))
+
+    with pytest.raises(AirflowException, match="job-7 failed: Query exceeded resource limits"):
+        operator.execute_complete({}, {"status": "error", "job_id": "job-7",
+                                       "message": "Query exceeded resource limits"})
+
+
+def test_execute_complete_reports_successful_job(operator, monkeypatch):
+    reported = []
+    monkeypatch.setattr(modules, "report_load_job", reported.append)
+
+    job_id = operator.execute_complete({}, {"status": "success", "job_id": "job-8", "message": "Job finished"})
+
+    assert job_id == "job-8"
+    assert reported == ["job-8"]